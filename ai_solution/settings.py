@@ -1,5 +1,5 @@
 import os
-from decouple import config
+from decouple import config, Csv
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -58,6 +58,8 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.site_settings',  # Add site settings to all templates
                 'core.context_processors.admin_notifications',  # Add admin notifications
+                'core.context_processors.chatbot',  # Chatbot streaming endpoint
+                'core.context_processors.cache_versions',  # Versions for {% cache %} fragments
             ],
         },
     },
@@ -185,6 +187,79 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Chatbot service (FastAPI app in chatbot/), e.g. http://127.0.0.1:8001/chat/stream
+CHATBOT_STREAM_URL = config('CHATBOT_STREAM_URL', default='')
+CHATBOT_DIR = BASE_DIR / 'chatbot'
+# /api/chatbot/ answers canned intents itself and forwards everything else here, e.g. http://127.0.0.1:8001/chat
+CHATBOT_API_URL = config('CHATBOT_API_URL', default='')
+CHATBOT_API_TIMEOUT = config('CHATBOT_API_TIMEOUT', default=8.0, cast=float)
+# Longer messages only get a canned intent answer when they are exactly one of its phrases
+CHATBOT_INTENT_MAX_WORDS = config('CHATBOT_INTENT_MAX_WORDS', default=4, cast=int)
+# Token buckets for questions forwarded to the chatbot service, per worker process; 0 turns a limit off
+CHATBOT_RATE_LIMIT_IP_PER_MINUTE = config('CHATBOT_RATE_LIMIT_IP_PER_MINUTE', default=30, cast=float)
+CHATBOT_RATE_LIMIT_IP_BURST = config('CHATBOT_RATE_LIMIT_IP_BURST', default=10, cast=int)
+CHATBOT_RATE_LIMIT_SESSION_PER_MINUTE = config('CHATBOT_RATE_LIMIT_SESSION_PER_MINUTE', default=12, cast=float)
+CHATBOT_RATE_LIMIT_SESSION_BURST = config('CHATBOT_RATE_LIMIT_SESSION_BURST', default=5, cast=int)
+# Reverse proxies in front of Django whose X-Forwarded-For is trusted, e.g. 127.0.0.1
+CHATBOT_TRUSTED_PROXIES = config('CHATBOT_TRUSTED_PROXIES', default='', cast=Csv())
+# Push Solution/Event/Article/Project/AboutUs changes into the chatbot vector store on save
+CHATBOT_KB_SYNC = config('CHATBOT_KB_SYNC', default=False, cast=bool)
+
+# SiteSettings.load(): shared cache entry (seconds, None = until the next save) and per-process copy
+SITE_SETTINGS_CACHE_TIMEOUT = config('SITE_SETTINGS_CACHE_TIMEOUT', default=None, cast=lambda v: int(v) if v else None)
+SITE_SETTINGS_LOCAL_TTL = config('SITE_SETTINGS_LOCAL_TTL', default=30, cast=int)
+
+# Cache backend: Redis when CACHE_URL is set (shared by all workers), otherwise per-process memory
+CACHE_URL = config('CACHE_URL', default='')
+# Buffered view counts are data, not a cache: keep them out of 'default' so page entries never
+# evict them. Point this at a Redis with maxmemory-policy noeviction (defaults to CACHE_URL).
+VIEW_COUNTER_CACHE_URL = config('VIEW_COUNTER_CACHE_URL', default=CACHE_URL)
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+if VIEW_COUNTER_CACHE_URL:
+    CACHES['view_counters'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': VIEW_COUNTER_CACHE_URL,
+        'KEY_PREFIX': 'view_counters',
+        'TIMEOUT': None,
+    }
+else:
+    CACHES['view_counters'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'view_counters',
+        'TIMEOUT': None,
+        # One key per viewed row; high enough that LocMemCache never culls a count
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    }
+
+# Anonymous page and {% cache %} fragment caching (core/page_cache.py); entries are
+# invalidated on save, the timeout only bounds how long superseded ones linger
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=True, cast=bool)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=600, cast=int)
+
+# Event/Project/BlogPost views are counted in the cache and written to views_count in
+# batches at most this often per process (core/view_counters.py); False writes every view
+VIEW_COUNTER_BUFFERED = config('VIEW_COUNTER_BUFFERED', default=True, cast=bool)
+VIEW_COUNTER_FLUSH_INTERVAL = config('VIEW_COUNTER_FLUSH_INTERVAL', default=60, cast=int)
+
+# Article downloads (core/downloads.py): 'django' streams the file itself, 'x-sendfile'
+# (Apache/lighttpd) and 'x-accel-redirect' (nginx) hand it to the web server
+DOWNLOAD_SERVE_MODE = config('DOWNLOAD_SERVE_MODE', default='django')
+# nginx internal location that maps to MEDIA_ROOT, used by x-accel-redirect
+DOWNLOAD_ACCEL_PREFIX = config('DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+DOWNLOAD_CHUNK_SIZE = config('DOWNLOAD_CHUNK_SIZE', default=64 * 1024, cast=int)
+
 # TinyMCE Configuration
 TINYMCE_DEFAULT_CONFIG = {
     'height': 400,
@@ -0,0 +1,294 @@
+# answer_cache.py
+import os
+import re
+import time
+import threading
+from collections import OrderedDict, Counter
+
+import numpy as np
+
+from state_backends import STATE_BACKEND, check_backend, get_database
+
+# ------------------------
+# Configuration
+# ------------------------
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+# Cosine similarity needed for a semantic hit; raise it if unrelated questions share answers
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_SEMANTIC = os.getenv("ANSWER_CACHE_SEMANTIC", "true").lower() == "true"
+
+# retriever.py rewrites this file whenever it rebuilds the ai_knowledge collection
+KB_VERSION_FILENAME = "kb_version"
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    query = _PUNCTUATION_RE.sub(" ", query.lower())
+    return _WHITESPACE_RE.sub(" ", query).strip()
+
+
+def read_kb_version(persist_directory):
+    try:
+        with open(os.path.join(persist_directory, KB_VERSION_FILENAME), encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class _Entry:
+    __slots__ = ("answer", "embedding", "created_at")
+
+    def __init__(self, answer, embedding, created_at):
+        self.answer = answer
+        self.embedding = embedding
+        self.created_at = created_at
+
+
+# ------------------------
+# Answer Cache
+# ------------------------
+class AnswerCache:
+    """
+    LRU/TTL cache of RAG answers.
+
+    Lookups try the normalised query text first, then (if an embedding is
+    given) the most similar cached query above `threshold`. The whole cache is
+    dropped when the knowledge-base version written by retriever.py changes.
+    """
+
+    def __init__(self, persist_directory=None, max_entries=ANSWER_CACHE_SIZE,
+                 ttl=ANSWER_CACHE_TTL, threshold=ANSWER_CACHE_THRESHOLD):
+        self.persist_directory = persist_directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._kb_version = read_kb_version(persist_directory) if persist_directory else None
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    # Called with the lock held
+    def _check_kb_version(self):
+        if not self.persist_directory:
+            return
+        version = read_kb_version(self.persist_directory)
+        if version != self._kb_version:
+            self._entries.clear()
+            self._kb_version = version
+            self._counts["invalidations"] += 1
+
+    def _live_entry(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry.created_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, query, embedding=None, record_miss=True):
+        """Return a cached answer for `query`, or None on a miss."""
+        key = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            self._check_kb_version()
+
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                self._counts["exact_hits"] += 1
+                return entry.answer
+
+            if embedding is not None:
+                match = self._most_similar(np.asarray(embedding, dtype=np.float32), now)
+                if match is not None:
+                    self._counts["semantic_hits"] += 1
+                    return match.answer
+
+            if record_miss:
+                self._counts["misses"] += 1
+            return None
+
+    def _most_similar(self, embedding, now):
+        candidates = [
+            (key, entry) for key, entry in self._entries.items()
+            if entry.embedding is not None and now - entry.created_at <= self.ttl
+        ]
+        if not candidates:
+            return None
+
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return None
+        matrix = np.stack([entry.embedding for _, entry in candidates])
+        scores = matrix @ (embedding / norm)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        key, entry = candidates[best]
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, query, answer, embedding=None):
+        key = normalize_query(query)
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(embedding)
+            embedding = embedding / norm if norm else None
+        with self._lock:
+            self._check_kb_version()
+            self._entries[key] = _Entry(answer, embedding, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            size = len(self._entries)
+        hits = counts.get("exact_hits", 0) + counts.get("semantic_hits", 0)
+        lookups = hits + counts.get("misses", 0)
+        return {
+            "size": size,
+            "exact_hits": counts.get("exact_hits", 0),
+            "semantic_hits": counts.get("semantic_hits", 0),
+            "misses": counts.get("misses", 0),
+            "invalidations": counts.get("invalidations", 0),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+# ------------------------
+# SQLite Answer Cache (shared by workers)
+# ------------------------
+ANSWER_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answer_cache (
+    key TEXT PRIMARY KEY,
+    answer TEXT NOT NULL,
+    embedding BLOB,
+    kb_version TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answer_cache_last_used ON answer_cache (last_used);
+"""
+
+
+class SQLiteAnswerCache(AnswerCache):
+    """
+    AnswerCache whose entries live in a SQLite file shared by every worker.
+
+    Rows are tagged with the knowledge-base version they were answered
+    against; rows from another version are never served and are deleted on
+    the next write. Hit/miss counters in stats() are per worker.
+    """
+
+    def __init__(self, persist_directory=None, max_entries=ANSWER_CACHE_SIZE,
+                 ttl=ANSWER_CACHE_TTL, threshold=ANSWER_CACHE_THRESHOLD, database=None):
+        super().__init__(persist_directory, max_entries, ttl, threshold)
+        self.db = database or get_database()
+        self.db.ensure_schema(ANSWER_CACHE_SCHEMA)
+
+    def _current_version(self):
+        version = read_kb_version(self.persist_directory) if self.persist_directory else None
+        return version or ""
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def get(self, query, embedding=None, record_miss=True):
+        """Return a cached answer for `query`, or None on a miss."""
+        key = normalize_query(query)
+        now = time.time()
+        version = self._current_version()
+
+        row = self.db.execute(
+            "SELECT answer FROM answer_cache WHERE key = ? AND kb_version = ? AND created_at > ?",
+            (key, version, now - self.ttl),
+        ).fetchone()
+        if row is not None:
+            self.db.execute("UPDATE answer_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._count("exact_hits")
+            return row[0]
+
+        if embedding is not None:
+            answer = self._most_similar_row(np.asarray(embedding, dtype=np.float32), version, now)
+            if answer is not None:
+                self._count("semantic_hits")
+                return answer
+
+        if record_miss:
+            self._count("misses")
+        return None
+
+    def _most_similar_row(self, embedding, version, now):
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return None
+        rows = self.db.execute(
+            "SELECT key, answer, embedding FROM answer_cache"
+            " WHERE embedding IS NOT NULL AND kb_version = ? AND created_at > ?",
+            (version, now - self.ttl),
+        ).fetchall()
+        rows = [row for row in rows if len(row[2]) == embedding.nbytes]
+        if not rows:
+            return None
+
+        matrix = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+        scores = matrix @ (embedding / norm)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        key, answer, _ = rows[best]
+        self.db.execute("UPDATE answer_cache SET last_used = ? WHERE key = ?", (now, key))
+        return answer
+
+    def put(self, query, answer, embedding=None):
+        key = normalize_query(query)
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(embedding)
+            embedding = (embedding / norm).tobytes() if norm else None
+        now = time.time()
+        version = self._current_version()
+
+        with self.db.transaction() as conn:
+            stale = conn.execute("DELETE FROM answer_cache WHERE kb_version != ?", (version,)).rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO answer_cache (key, answer, embedding, kb_version, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, answer, embedding, version, now, now),
+            )
+            conn.execute(
+                "DELETE FROM answer_cache WHERE key IN ("
+                " SELECT key FROM answer_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        if stale:
+            self._count("invalidations")
+
+    def clear(self):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM answer_cache")
+
+    def stats(self):
+        stats = super().stats()
+        stats["size"] = self.db.execute("SELECT COUNT(*) FROM answer_cache").fetchone()[0]
+        return stats
+
+
+def create_answer_cache(persist_directory=None, backend=STATE_BACKEND):
+    if check_backend(backend) == "sqlite":
+        return SQLiteAnswerCache(persist_directory=persist_directory)
+    return AnswerCache(persist_directory=persist_directory)
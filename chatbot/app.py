@@ -1,14 +1,50 @@
 # app.py
-from fastapi import FastAPI
+import time
+IMPORT_STARTED = time.perf_counter()  # for /ready's startup timings
+
+import os
+import json
+import asyncio
+import logging
+import threading
+import contextlib
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
-from rag_pipeline import create_rag_pipeline, create_casual_chain, create_classifier, run_rag_query
+from rag_pipeline import (
+    CHROMA_PATH, setup_generator, build_default_retriever, create_rag_pipeline, create_casual_chain,
+    create_classifier, get_embedding_function, arun_rag_query, astream_rag_query,
+)
 from langchain_core.messages import HumanMessage, AIMessage
+from conversation_store import create_conversation_store, SESSION_HEADER, get_session_id, attach_session_id
+from router import QueryRouter
+from answer_cache import create_answer_cache, normalize_query, ANSWER_CACHE_SEMANTIC
+from query_rewriter import QueryRewriter
+from llm_callbacks import LLMCallCounter, StageTimer
+from metrics import Registry, CONTENT_TYPE
+from state_backends import STATE_BACKEND
+from rate_limit import (
+    RATE_LIMIT_IP_PER_MINUTE, RATE_LIMIT_IP_BURST, RATE_LIMIT_SESSION_PER_MINUTE, RATE_LIMIT_SESSION_BURST,
+    TokenBucketLimiter, RequestCoalescer, acquire_all, client_ip,
+)
+
+logger = logging.getLogger("chatbot")
+
+# Build chains and touch the index in the background as soon as the worker starts
+WARMUP_ON_STARTUP = os.getenv("CHAT_WARMUP", "true").lower() == "true"
 
 # ------------------------
 # FastAPI Setup
 # ------------------------
-app = FastAPI(title="AI Solutions Chatbot")
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    if WARMUP_ON_STARTUP:
+        # Not awaited: the worker accepts connections (and /ready says 503) while this runs
+        app.state.warmup = asyncio.create_task(warm_up())
+    yield
+
+app = FastAPI(title="AI Solutions Chatbot", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,15 +52,178 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[SESSION_HEADER, "Server-Timing"],
 )
 
 # ------------------------
-# Initialize RAG, Casual Chain, and Classifier
+# Shared State
+# ------------------------
+# CHAT_STATE_BACKEND=sqlite lets several uvicorn/gunicorn workers share sessions and cached answers
+router = QueryRouter.from_examples()  # local fast path; LLM classifier only on low confidence
+conversations = create_conversation_store()
+answer_cache = create_answer_cache(persist_directory=CHROMA_PATH)
+query_rewriter = QueryRewriter()
+# Per worker: one bucket per client IP and one per chat session
+ip_limiter = TokenBucketLimiter(RATE_LIMIT_IP_PER_MINUTE, RATE_LIMIT_IP_BURST)
+session_limiter = TokenBucketLimiter(RATE_LIMIT_SESSION_PER_MINUTE, RATE_LIMIT_SESSION_BURST)
+# Identical opening questions in flight at the same time share one answer
+coalescer = RequestCoalescer()
+
+async def run_state(func, *args, **kwargs):
+    # SQLite stores block on disk I/O and the write lock; keep them off the event loop
+    if STATE_BACKEND == "sqlite":
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+# ------------------------
+# Initialize RAG, Casual Chain, and Classifier (per worker, on first use)
+# ------------------------
+class ChatPipelines:
+    """LLM chains, Chroma client and embeddings owned by one worker process."""
+
+    def __init__(self):
+        started = time.perf_counter()
+        # One LLM client for RAG, casual replies and classification
+        self.llm = setup_generator()
+        self.retriever = build_default_retriever()
+        self.rag_chain, _ = create_rag_pipeline(query_rewriter, llm=self.llm, retriever=self.retriever)
+        self.casual_chain, _ = create_casual_chain(self.llm)
+        self.classifier = create_classifier(self.llm)
+        self.cache_embeddings = get_embedding_function() if ANSWER_CACHE_SEMANTIC else None
+        self.pid = os.getpid()
+        self.build_seconds = time.perf_counter() - started
+
+    def warm_up(self):
+        """Load the HNSW segment and BM25 index with one local query (no LLM call)."""
+        self.retriever.invoke("AI solutions")
+
+_pipelines = None
+_pipelines_lock = threading.Lock()
+
+def get_pipelines():
+    # Built after fork, so workers never share a Chroma client or HTTP connections
+    global _pipelines
+    if _pipelines is None or _pipelines.pid != os.getpid():
+        with _pipelines_lock:
+            if _pipelines is None or _pipelines.pid != os.getpid():
+                _pipelines = ChatPipelines()
+    return _pipelines
+
+async def aget_pipelines():
+    if _pipelines is not None and _pipelines.pid == os.getpid():
+        return _pipelines
+    # First request in this worker: build off the event loop
+    return await asyncio.to_thread(get_pipelines)
+
+startup = {"imported_seconds": None, "ready_seconds": None, "error": None}
+
+async def warm_up():
+    try:
+        pipelines = await aget_pipelines()
+        await asyncio.to_thread(pipelines.warm_up)
+    except Exception as e:
+        # Requests still build lazily; /ready reports the failure
+        logger.exception("Chatbot warm-up failed")
+        startup["error"] = str(e)
+        return
+    startup["ready_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 3)
+    logger.info("Chatbot ready in %.2fs (pipelines built in %.2fs)",
+                startup["ready_seconds"], pipelines.build_seconds)
+
+# ------------------------
+# Concurrency Limits
+# ------------------------
+# Max LLM-bound requests in flight per worker; further requests wait their turn
+MAX_CONCURRENT_CHATS = int(os.getenv("CHAT_MAX_CONCURRENCY", "32"))
+CLASSIFY_TIMEOUT = float(os.getenv("CHAT_CLASSIFY_TIMEOUT", "5"))
+GENERATE_TIMEOUT = float(os.getenv("CHAT_GENERATE_TIMEOUT", "30"))
+QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "10"))
+chat_slots = asyncio.Semaphore(MAX_CONCURRENT_CHATS)
+in_flight = 0  # requests holding a chat slot, for the in-flight gauge
+
+BUSY_MESSAGE = "We're helping a lot of visitors right now—please try again in a moment!"
+ERROR_MESSAGE = "I'm having trouble processing that—let's try another question!"
+RATE_LIMIT_MESSAGE = "You're sending messages a little too quickly—please wait a moment and try again."
+
+class ChatBusy(Exception):
+    """No chat slot came free within QUEUE_TIMEOUT."""
+
+# ------------------------
+# Metrics (per worker; scrape GET /metrics)
 # ------------------------
-rag_chain, llm_rag = create_rag_pipeline()
-casual_chain, llm_casual = create_casual_chain()
-classifier = create_classifier(llm_rag)  # use same LLM for classification
-chat_history = []
+metrics = Registry()
+REQUESTS = metrics.counter("chatbot_requests_total", "Chat requests by endpoint, route and outcome.",
+                           ("endpoint", "route", "status"))
+REQUEST_SECONDS = metrics.histogram("chatbot_request_duration_seconds", "End-to-end chat request latency.",
+                                    ("endpoint",))
+STAGE_SECONDS = metrics.histogram("chatbot_stage_duration_seconds",
+                                  "Time per pipeline stage (classify, rewrite, retrieve, generate).", ("stage",))
+LLM_CALLS = metrics.counter("chatbot_llm_calls_total", "LLM calls made while answering chat requests.")
+LLM_TOKENS = metrics.counter("chatbot_llm_tokens_total", "Tokens reported by the LLM.", ("type",))
+FALLBACKS = metrics.counter("chatbot_fallbacks_total", "Failures answered with a fallback instead of an error.",
+                            ("reason",))
+CACHE_LOOKUPS = metrics.counter("chatbot_answer_cache_lookups_total", "Answer cache lookups by result.", ("result",))
+CACHE_ENTRIES = metrics.gauge("chatbot_answer_cache_entries", "Answers currently cached.")
+CACHE_HIT_RATIO = metrics.gauge("chatbot_answer_cache_hit_ratio", "Answer cache hits / lookups.")
+ROUTER_DECISIONS = metrics.counter("chatbot_router_decisions_total", "Query routing decisions by source.", ("source",))
+REWRITES = metrics.counter("chatbot_query_rewrites_total", "Follow-up rewrite decisions.", ("result",))
+IN_FLIGHT = metrics.gauge("chatbot_requests_in_flight", "Chat requests holding a concurrency slot.")
+RATE_LIMITED = metrics.counter("chatbot_rate_limited_total", "Chat requests rejected by a rate limit.", ("scope",))
+RATE_LIMIT_RATE = metrics.gauge("chatbot_rate_limit_per_minute", "Configured requests per minute (0 = off).",
+                                ("scope",))
+RATE_LIMIT_BURST = metrics.gauge("chatbot_rate_limit_burst", "Configured burst size.", ("scope",))
+RATE_LIMIT_KEYS = metrics.gauge("chatbot_rate_limit_tracked_keys", "Clients with a token bucket.", ("scope",))
+COALESCED = metrics.counter("chatbot_coalesced_requests_total",
+                            "Opening questions answered by their own call (leader) or a shared one (follower).",
+                            ("role",))
+
+def collect_component_metrics():
+    cache = answer_cache.stats()
+    for result in ("exact_hits", "semantic_hits", "misses"):
+        CACHE_LOOKUPS.set(cache[result], result=result)
+    CACHE_ENTRIES.set(cache["size"])
+    CACHE_HIT_RATIO.set(cache["hit_rate"])
+
+    routing = router.stats()
+    ROUTER_DECISIONS.set(routing["rule_hits"], source="rule")
+    ROUTER_DECISIONS.set(routing["model_hits"], source="model")
+    ROUTER_DECISIONS.set(routing["llm_fallbacks"], source="llm")
+
+    for result, count in query_rewriter.stats().items():
+        if result != "cache_size":
+            REWRITES.set(count, result=result)
+
+    IN_FLIGHT.set(in_flight)
+
+    for scope, limiter, per_minute, burst in (
+        ("ip", ip_limiter, RATE_LIMIT_IP_PER_MINUTE, RATE_LIMIT_IP_BURST),
+        ("session", session_limiter, RATE_LIMIT_SESSION_PER_MINUTE, RATE_LIMIT_SESSION_BURST),
+    ):
+        RATE_LIMIT_RATE.set(per_minute, scope=scope)
+        RATE_LIMIT_BURST.set(burst, scope=scope)
+        RATE_LIMIT_KEYS.set(len(limiter), scope=scope)
+
+    coalescing = coalescer.stats()
+    COALESCED.set(coalescing["leaders"], role="leader")
+    COALESCED.set(coalescing["followers"], role="follower")
+
+metrics.add_collector(collect_component_metrics)
+
+def record_request(endpoint, outcome, started, counter=None, timer=None):
+    REQUESTS.inc(endpoint=endpoint, route=outcome.get("route", "none"), status=outcome.get("status", "ok"))
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    if timer is not None:
+        for name, seconds in timer.durations.items():
+            STAGE_SECONDS.observe(seconds, stage=name)
+    if counter is not None:
+        LLM_CALLS.inc(counter.llm_calls)
+        LLM_TOKENS.inc(counter.input_tokens, type="input")
+        LLM_TOKENS.inc(counter.output_tokens, type="output")
+
+def fallback(outcome, reason):
+    FALLBACKS.inc(reason=reason)
+    if outcome is not None:
+        outcome["status"] = "fallback"
 
 # ------------------------
 # Request/Response Models
@@ -34,50 +233,332 @@ class QueryRequest(BaseModel):
 
 class QueryResponse(BaseModel):
     response: str
+    llm_calls: int = 0
 
 # ------------------------
-# Routes
+# Answer Generation
 # ------------------------
-@app.post("/chat", response_model=QueryResponse)
-async def chat(request: QueryRequest):
-    global chat_history
+async def classify_query(user_query, config=None, outcome=None):
+    label = router.route(user_query)
+    if label is not None:
+        return label
 
-    user_query = request.query.strip()
-    if not user_query:
-        return QueryResponse(response="Please enter a valid message.")
+    classifier = (await aget_pipelines()).classifier
+    try:
+        classification = await asyncio.wait_for(
+            classifier.ainvoke({"input": user_query}, config=config), timeout=CLASSIFY_TIMEOUT
+        )
+        return classification.strip().upper()
+    except asyncio.TimeoutError:
+        logger.warning("Classifier timed out after %ss; treating query as KNOWLEDGE", CLASSIFY_TIMEOUT)
+        fallback(outcome, "classify_timeout")
+    except Exception:
+        logger.exception("Classifier failed; treating query as KNOWLEDGE")
+        fallback(outcome, "classify_error")
+    return "KNOWLEDGE"  # fallback
+
+async def lookup_cached_answer(user_query, chat_history):
+    """
+    Return (answer, embedding) for a knowledge query.
+
+    Only opening questions are cached: later turns depend on the conversation.
+    """
+    if chat_history:
+        return None, None
 
-    # Append user message
-    chat_history.append(HumanMessage(content=user_query))
+    cache_embeddings = (await aget_pipelines()).cache_embeddings
+    # Exact-text hits skip the embedding call entirely
+    answer = await run_state(answer_cache.get, user_query, record_miss=cache_embeddings is None)
+    if answer is not None or cache_embeddings is None:
+        return answer, None
 
-    # Classify query
     try:
-        classification = classifier.invoke({"input": user_query}).strip().upper()
+        embedding = await cache_embeddings.aembed_query(user_query)
     except Exception:
-        classification = "KNOWLEDGE"  # fallback
+        # Semantic lookup is an optimisation; answer normally without it
+        logger.warning("Answer cache embedding failed; skipping semantic lookup", exc_info=True)
+        FALLBACKS.inc(reason="cache_embedding_error")
+        return None, None
+    return await run_state(answer_cache.get, user_query, embedding), embedding
+
+def stage(config, name):
+    # Per-stage wall time when a StageTimer rides along in the run config
+    for handler in (config or {}).get("callbacks", []):
+        if isinstance(handler, StageTimer):
+            return handler.stage(name)
+    return contextlib.nullcontext()
+
+async def prepare_pipelines(config):
+    # A cold worker's chain build gets its own stage instead of inflating "classify"
+    if _pipelines is not None and _pipelines.pid == os.getpid():
+        return _pipelines
+    with stage(config, "build"):
+        return await aget_pipelines()
+
+async def generate_answer(user_query, chat_history, config=None, outcome=None):
+    """Answer one query; `outcome` (a dict) receives the route taken and the status."""
+    outcome = {} if outcome is None else outcome
+    pipelines = await prepare_pipelines(config)
+    with stage(config, "classify"):
+        classification = await classify_query(user_query, config, outcome)
+    outcome["route"] = classification.lower()
+
+    cached, embedding = None, None
+    if classification != "CASUAL":
+        cached, embedding = await lookup_cached_answer(user_query, chat_history)
+        if cached is not None:
+            outcome["route"] = "cached"
+            return cached
 
-    # Generate response
     try:
         if classification == "CASUAL":
-            answer = casual_chain.invoke({
+            coro = pipelines.casual_chain.ainvoke({
                 "input": user_query,
                 "chat_history": chat_history[-4:]  # last few messages
-            })
+            }, config=config)
         else:
-            answer = run_rag_query(rag_chain, user_query, chat_history[-10:])
+            coro = arun_rag_query(pipelines.rag_chain, user_query, chat_history[-10:], config)
+        answer = await asyncio.wait_for(coro, timeout=GENERATE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Generation timed out after %ss (route=%s)", GENERATE_TIMEOUT, outcome["route"])
+        fallback(outcome, "generate_timeout")
+        return ERROR_MESSAGE
     except Exception:
-        answer = "I'm having trouble processing that—let's try another question!"
+        logger.exception("Generation failed (route=%s)", outcome["route"])
+        fallback(outcome, "generate_error")
+        return ERROR_MESSAGE
+
+    if classification != "CASUAL" and not chat_history:
+        await run_state(answer_cache.put, user_query, answer, embedding)
+    return answer
+
+async def stream_answer(user_query, chat_history, config=None, outcome=None):
+    """Yield answer tokens as the chosen chain produces them."""
+    outcome = {} if outcome is None else outcome
+    pipelines = await prepare_pipelines(config)
+    with stage(config, "classify"):
+        classification = await classify_query(user_query, config, outcome)
+    outcome["route"] = classification.lower()
+
+    cached, embedding = None, None
+    if classification != "CASUAL":
+        cached, embedding = await lookup_cached_answer(user_query, chat_history)
+        if cached is not None:
+            outcome["route"] = "cached"
+            yield cached
+            return
+
+    if classification == "CASUAL":
+        tokens = pipelines.casual_chain.astream({
+            "input": user_query,
+            "chat_history": chat_history[-4:]
+        }, config=config)
+    else:
+        tokens = astream_rag_query(pipelines.rag_chain, user_query, chat_history[-10:], config)
 
-    # Append AI response
-    chat_history.append(AIMessage(content=answer))
+    # GENERATE_TIMEOUT bounds the whole generation, not each token
+    deadline = time.monotonic() + GENERATE_TIMEOUT
+    parts = []
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            try:
+                token = await asyncio.wait_for(tokens.__anext__(), timeout=remaining)
+            except StopAsyncIteration:
+                break
+            parts.append(token)
+            yield token
+    finally:
+        await tokens.aclose()
+
+    if classification != "CASUAL" and not chat_history and parts:
+        await run_state(answer_cache.put, user_query, "".join(parts), embedding)
+
+def check_rate_limit(http_request, session_id):
+    """None when the request may go ahead, else the seconds until it may retry."""
+    claims = (("ip", ip_limiter, client_ip(http_request)), ("session", session_limiter, session_id))
+    # Both buckets or neither: a session over its limit doesn't use up its IP's tokens
+    refused, retry_after = acquire_all((limiter, key) for _, limiter, key in claims)
+    if refused is None:
+        return None
+    scope, _, key = claims[refused]
+    RATE_LIMITED.inc(scope=scope)
+    logger.warning("Rate limited %s=%s for %.1fs", scope, key, retry_after)
+    return retry_after
 
-    # Trim chat history to prevent token overflow
-    if len(chat_history) > 20:
-        chat_history = chat_history[-20:]
+async def acquire_slot():
+    global in_flight
+    await asyncio.wait_for(chat_slots.acquire(), timeout=QUEUE_TIMEOUT)
+    in_flight += 1
+
+def release_slot():
+    global in_flight
+    in_flight -= 1
+    chat_slots.release()
+
+async def answer_with_slot(user_query, chat_history, config, outcome):
+    try:
+        await acquire_slot()
+    except asyncio.TimeoutError:
+        raise ChatBusy from None
+    try:
+        return await generate_answer(user_query, chat_history, config, outcome)
+    finally:
+        release_slot()
+
+def sse_event(data, event=None):
+    payload = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{payload}" if event else payload
+
+# ------------------------
+# Routes
+# ------------------------
+@app.post("/chat", response_model=QueryResponse)
+async def chat(request: QueryRequest, http_request: Request, response: Response):
+    started = time.perf_counter()
+    session_id, _ = get_session_id(http_request)
+    attach_session_id(response, session_id)
+
+    user_query = request.query.strip()
+    if not user_query:
+        record_request("chat", {"status": "empty"}, started)
+        return QueryResponse(response="Please enter a valid message.")
 
-    return QueryResponse(response=answer)
+    retry_after = check_rate_limit(http_request, session_id)
+    if retry_after is not None:
+        record_request("chat", {"status": "rate_limited"}, started)
+        response.status_code = 429
+        response.headers["Retry-After"] = str(max(1, round(retry_after)))
+        return QueryResponse(response=RATE_LIMIT_MESSAGE)
+
+    # Prior turns for this session only; the current query goes in as "input"
+    chat_history = await run_state(conversations.get_history, session_id)
+
+    counter, timer, outcome = LLMCallCounter(), StageTimer(), {}
+    config = {"callbacks": [counter, timer]}
+    try:
+        if chat_history:
+            answer = await answer_with_slot(user_query, chat_history, config, outcome)
+        else:
+            # Opening questions don't depend on the session, so duplicates can share the work
+            answer, shared = await coalescer.run(
+                normalize_query(user_query), lambda: answer_with_slot(user_query, chat_history, config, outcome)
+            )
+            if shared:
+                outcome["route"] = "coalesced"
+    except ChatBusy:
+        logger.warning("No chat slot free after %ss; returning 503", QUEUE_TIMEOUT)
+        record_request("chat", {"status": "busy"}, started)
+        response.status_code = 503
+        return QueryResponse(response=BUSY_MESSAGE)
+    response.headers["Server-Timing"] = timer.server_timing()
+    record_request("chat", outcome, started, counter, timer)
+
+    # Store the turn; the session ring buffer keeps history bounded
+    await run_state(conversations.append, session_id, HumanMessage(content=user_query), AIMessage(content=answer))
+
+    logger.info("chat session=%s history=%d llm_calls=%d timings=%s",
+                session_id, len(chat_history), counter.llm_calls, timer.as_dict())
+    return QueryResponse(response=answer, llm_calls=counter.llm_calls)
+
+@app.post("/chat/stream")
+async def chat_stream(request: QueryRequest, http_request: Request):
+    started = time.perf_counter()
+    session_id, _ = get_session_id(http_request)
+    user_query = request.query.strip()
+
+    retry_after = check_rate_limit(http_request, session_id) if user_query else None
+    if retry_after is not None:
+        record_request("chat_stream", {"status": "rate_limited"}, started)
+        response = JSONResponse({"response": RATE_LIMIT_MESSAGE}, status_code=429,
+                                headers={"Retry-After": str(max(1, round(retry_after)))})
+        attach_session_id(response, session_id)
+        return response
+
+    chat_history = await run_state(conversations.get_history, session_id)
+
+    async def event_stream():
+        if not user_query:
+            record_request("chat_stream", {"status": "empty"}, started)
+            yield sse_event({"response": "Please enter a valid message."}, event="done")
+            return
+
+        try:
+            await acquire_slot()
+        except asyncio.TimeoutError:
+            logger.warning("No chat slot free after %ss; rejecting stream", QUEUE_TIMEOUT)
+            record_request("chat_stream", {"status": "busy"}, started)
+            yield sse_event({"message": BUSY_MESSAGE}, event="error")
+            return
+
+        parts = []
+        counter, timer, outcome = LLMCallCounter(), StageTimer(), {}
+        try:
+            async for token in stream_answer(user_query, chat_history, {"callbacks": [counter, timer]}, outcome):
+                parts.append(token)
+                yield sse_event({"token": token})
+        except asyncio.TimeoutError:
+            logger.warning("Streaming timed out after %ss (%d tokens sent)", GENERATE_TIMEOUT, len(parts))
+            fallback(outcome, "generate_timeout")
+        except Exception:
+            logger.exception("Streaming failed (%d tokens sent)", len(parts))
+            fallback(outcome, "generate_error")
+        finally:
+            release_slot()
+        if not parts:
+            parts.append(ERROR_MESSAGE)
+            yield sse_event({"token": ERROR_MESSAGE})
+        record_request("chat_stream", outcome, started, counter, timer)
+
+        answer = "".join(parts)
+        await run_state(conversations.append, session_id, HumanMessage(content=user_query), AIMessage(content=answer))
+        logger.info("chat/stream session=%s history=%d llm_calls=%d timings=%s",
+                    session_id, len(chat_history), counter.llm_calls, timer.as_dict())
+        yield sse_event({"response": answer, "llm_calls": counter.llm_calls, "timings": timer.as_dict()}, event="done")
+
+    response = StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    attach_session_id(response, session_id)
+    return response
 
 @app.post("/reset")
-async def reset_chat():
-    global chat_history
-    chat_history = []
+async def reset_chat(http_request: Request, response: Response):
+    session_id, _ = get_session_id(http_request)
+    await run_state(conversations.reset, session_id)
+    attach_session_id(response, session_id)
     return {"status": "chat reset"}
+
+@app.get("/router/stats")
+async def router_stats():
+    return router.stats()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return await run_state(answer_cache.stats)
+
+@app.get("/rewrite/stats")
+async def rewrite_stats():
+    return query_rewriter.stats()
+
+@app.get("/coalesce/stats")
+async def coalesce_stats():
+    return coalescer.stats()
+
+@app.get("/ready")
+async def ready(response: Response):
+    """Readiness probe: 503 until this worker's warm-up has finished."""
+    if WARMUP_ON_STARTUP and startup["ready_seconds"] is None:
+        response.status_code = 503
+        return {"status": "error" if startup["error"] else "starting", **startup}
+    return {"status": "ready", **startup}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(await run_state(metrics.render), media_type=CONTENT_TYPE)
+
+startup["imported_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 3)
@@ -0,0 +1,234 @@
+# load_test.py
+"""
+Throughput and p50/p95/p99 latency for POST /chat under concurrent load.
+
+Replays the conversations in load_queries.json (casual, knowledge and
+multi-turn follow-ups, each with its own session) from `--concurrency`
+virtual users. Per-stage times (classify, rewrite, retrieve, generate) are
+read from the Server-Timing header.
+
+By default the app runs in-process with the fake LLM and hashing embeddings
+over a throwaway Chroma index, so no API keys are needed:
+
+    python benchmarks/load_test.py --concurrency 16 --conversations 200
+
+To load a running server instead (start it with LLM_BACKEND=fake and
+EMBEDDING_BACKEND=hashing to keep it deterministic):
+
+    python benchmarks/load_test.py --url http://127.0.0.1:8000
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+import statistics
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CHATBOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, CHATBOT_DIR)
+
+import httpx  # noqa: E402
+
+QUERIES_PATH = os.path.join(BENCH_DIR, "load_queries.json")
+STAGES = ("classify", "rewrite", "retrieve", "generate")
+
+
+# ------------------------
+# Setup
+# ------------------------
+def load_conversations(path=QUERIES_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def configure_offline_app(args, workdir):
+    """Environment for an in-process app: must run before app/rag_pipeline are imported."""
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    os.environ["CHROMA_PATH"] = os.path.join(workdir, "chroma")
+    os.environ["CHAT_STATE_BACKEND"] = args.state_backend
+    os.environ["VECTOR_BACKEND"] = args.vector_backend
+    os.environ["CHAT_STATE_DB"] = os.path.join(workdir, "chat_state.sqlite3")
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_LLM_TOKEN_LATENCY_MS"] = str(args.token_latency_ms)
+    # Every virtual user shares one client address; measure the app, not the limiter
+    os.environ.setdefault("CHAT_RATE_LIMIT_IP_PER_MINUTE", "0")
+    os.environ.setdefault("CHAT_RATE_LIMIT_SESSION_PER_MINUTE", "0")
+    if args.no_answer_cache:
+        os.environ["ANSWER_CACHE_SIZE"] = "0"
+
+
+def build_offline_client(args, workdir):
+    configure_offline_app(args, workdir)
+
+    import retriever as kb
+    kb.main()  # index the JSON knowledge base into the temp Chroma directory
+
+    import app as chat_app
+    transport = httpx.ASGITransport(app=chat_app.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout)
+
+
+def parse_server_timing(header):
+    timings = {}
+    for part in (header or "").split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        if name and duration:
+            timings[name] = float(duration)
+    return timings
+
+
+# ------------------------
+# Load Generation
+# ------------------------
+async def run_conversation(client, conversation, results):
+    session_id = uuid.uuid4().hex
+    for turn, query in enumerate(conversation["turns"]):
+        kind = conversation["kind"] if conversation["kind"] != "multi-turn" or turn == 0 else "follow-up"
+        started = time.perf_counter()
+        try:
+            response = await client.post("/chat", json={"query": query}, headers={"X-Session-ID": session_id})
+            status = response.status_code
+            payload = response.json() if status == 200 else {}
+            timings = parse_server_timing(response.headers.get("Server-Timing"))
+        except httpx.HTTPError:
+            status, payload, timings = "error", {}, {}
+        results.append({
+            "kind": kind,
+            "status": status,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "llm_calls": payload.get("llm_calls", 0),
+            "timings": timings,
+        })
+
+
+async def run_load(client, conversations, total, concurrency):
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(conversations[i % len(conversations)])
+    results = []
+
+    async def user():
+        while True:
+            try:
+                conversation = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await run_conversation(client, conversation, results)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+# ------------------------
+# Report
+# ------------------------
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def summarize(results, elapsed, concurrency):
+    ok = [r for r in results if r["status"] == 200]
+    latencies = [r["latency_ms"] for r in ok]
+
+    by_kind = defaultdict(list)
+    for r in ok:
+        by_kind[r["kind"]].append(r["latency_ms"])
+
+    stages = {}
+    for stage in STAGES + ("total",):
+        values = [r["timings"][stage] for r in ok if stage in r["timings"]]
+        stages[stage] = {
+            "mean_ms": round(statistics.mean(values), 2) if values else 0.0,
+            "p95_ms": round(percentile(values, 95), 2),
+        }
+
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2) if latencies else 0.0,
+        },
+        "by_kind": {
+            kind: {"count": len(v), "p50_ms": round(percentile(v, 50), 2), "p95_ms": round(percentile(v, 95), 2)}
+            for kind, v in sorted(by_kind.items())
+        },
+        "llm_calls_per_request": round(statistics.mean(r["llm_calls"] for r in ok), 3) if ok else 0.0,
+        "stages": stages,
+    }
+
+
+def print_report(report):
+    lat = report["latency_ms"]
+    print(f"\n{report['requests']} requests, {report['errors']} errors, concurrency={report['concurrency']}, "
+          f"{report['elapsed_s']}s")
+    print(f"throughput: {report['throughput_rps']} req/s   "
+          f"latency ms: p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}")
+    print(f"LLM calls per request: {report['llm_calls_per_request']}")
+
+    print(f"\n{'kind':<14}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for kind, r in report["by_kind"].items():
+        print(f"{kind:<14}{r['count']:>8}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+
+    print(f"\n{'stage':<14}{'mean ms':>10}{'p95 ms':>10}")
+    for stage, r in report["stages"].items():
+        print(f"{stage:<14}{r['mean_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+
+
+async def main_async(args):
+    conversations = load_conversations(args.queries)
+    with tempfile.TemporaryDirectory(prefix="chatbot_load_") as workdir:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        else:
+            client = build_offline_client(args, workdir)
+
+        async with client:
+            if args.warmup:
+                await run_load(client, conversations, len(conversations), 1)
+            results, elapsed = await run_load(client, conversations, args.conversations, args.concurrency)
+
+    report = summarize(results, elapsed, args.concurrency)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="load a running server instead of an in-process app")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--conversations", type=int, default=200, help="conversations to replay")
+    parser.add_argument("--queries", default=QUERIES_PATH)
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="fake LLM latency per call")
+    parser.add_argument("--token-latency-ms", type=float, default=5, help="fake LLM latency per streamed token")
+    parser.add_argument("--state-backend", default="memory", choices=("memory", "sqlite"))
+    parser.add_argument("--vector-backend", default="chroma", choices=("chroma", "snapshot"))
+    parser.add_argument("--no-answer-cache", action="store_true", help="measure every request end to end")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false",
+                        help="skip the untimed pass that builds the chains")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="write the report as JSON")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# retrieval_benchmark.py
+"""
+Recall@k / MRR / latency for the chatbot retrievers on a fixed question set.
+
+Builds a throwaway in-memory Chroma collection from the JSON knowledge base,
+so it never touches data1/ai, once per chunking strategy so the structured
+chunker can be compared with the legacy 500/50 splitter. Also reports how
+much of the source text survives chunking and how many tokens the top-k
+chunks put into the prompt. The hashing backend needs no network:
+
+    python benchmarks/retrieval_benchmark.py --backend hashing --k 5 --chunking legacy,structured
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from langchain_chroma import Chroma  # noqa: E402
+
+import embedding_backends  # noqa: E402
+import retriever as kb  # noqa: E402
+from context_budget import count_tokens  # noqa: E402
+from hybrid_retriever import BM25Index, HybridRetriever, LexicalReranker, CrossEncoderReranker  # noqa: E402
+
+QUESTIONS_PATH = os.path.join(BENCH_DIR, "retrieval_questions.json")
+
+
+# ------------------------
+# Setup
+# ------------------------
+def load_questions(path=QUESTIONS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_store(chunks, backend):
+    vector_store = Chroma(
+        collection_name=f"bench_{uuid.uuid4().hex[:8]}",
+        embedding_function=embedding_backends.get_embedding_function(backend),
+    )
+    ids, chunks = kb.assign_chunk_ids(chunks)
+    vector_store.add_documents(chunks, ids=ids)
+    return vector_store
+
+
+class BM25Only:
+    def __init__(self, vector_store, k):
+        self.index = BM25Index.from_vector_store(vector_store)
+        self.k = k
+
+    def invoke(self, query):
+        return self.index.search(query, self.k)
+
+
+def build_retrievers(vector_store, k, modes):
+    builders = {
+        "vector": lambda: vector_store.as_retriever(search_type="similarity", search_kwargs={"k": k}),
+        "bm25": lambda: BM25Only(vector_store, k),
+        "hybrid": lambda: HybridRetriever(vector_store=vector_store, k=k),
+        "hybrid+lexical": lambda: HybridRetriever(vector_store=vector_store, k=k, reranker=LexicalReranker()),
+        "hybrid+cross-encoder": lambda: HybridRetriever(vector_store=vector_store, k=k, reranker=CrossEncoderReranker()),
+    }
+    return {mode: builders[mode]() for mode in modes}
+
+
+# ------------------------
+# Evaluation
+# ------------------------
+def evaluate(retriever, questions, repeat=3):
+    hits, reciprocal_ranks, latencies, context_tokens = 0, [], [], []
+    for item in questions:
+        expected = item["expected"].lower()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            docs = retriever.invoke(item["question"])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        rank = next((i + 1 for i, doc in enumerate(docs) if expected in doc.page_content.lower()), None)
+        hits += rank is not None
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        context_tokens.append(sum(count_tokens(doc.page_content) for doc in docs))
+
+    latencies.sort()
+    return {
+        "recall": hits / len(questions),
+        "mrr": statistics.mean(reciprocal_ranks),
+        "context_tokens": statistics.mean(context_tokens),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def content_coverage(documents, chunks):
+    """Share of the source lines (facts) that appear whole in at least one chunk."""
+    text = "\n".join(chunk.page_content for chunk in chunks)
+    lines = [line.strip() for doc in documents for line in doc.page_content.split("\n") if line.strip()]
+    return sum(line in text for line in lines) / len(lines) if lines else 1.0
+
+
+def print_report(title, results, k):
+    print(f"\n{title}")
+    print(f"{'mode':<22}{'recall@' + str(k):>10}{'MRR':>8}{'ctx tok':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<22}{r['recall']:>10.3f}{r['mrr']:>8.3f}{r['context_tokens']:>10.1f}"
+              f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="hashing", help="embedding backend (google, hashing, sentence-transformers)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--modes", default="vector,bm25,hybrid,hybrid+lexical",
+                        help="comma-separated: vector, bm25, hybrid, hybrid+lexical, hybrid+cross-encoder")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per question")
+    parser.add_argument("--questions", default=QUESTIONS_PATH)
+    parser.add_argument("--chunking", default="legacy,structured", help="comma-separated: legacy, structured")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    documents = kb.load_json_kb(kb.JSON_PATH)
+    for strategy in args.chunking.split(","):
+        chunks = kb.chunk_documents(documents, strategy)
+        vector_store = build_store(chunks, args.backend)
+
+        retrievers = build_retrievers(vector_store, args.k, args.modes.split(","))
+        results = {mode: evaluate(r, questions, args.repeat) for mode, r in retrievers.items()}
+        print_report(
+            f"{strategy} chunking: {len(questions)} questions, {len(chunks)} chunks, "
+            f"{content_coverage(documents, chunks):.0%} of source lines kept, backend={args.backend}",
+            results, args.k,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# startup_benchmark.py
+"""
+Cold-start time of the chat service: import, ready (chains built and index
+warmed) and first request, each measured in a fresh interpreter.
+
+Runs offline with the fake LLM and hashing embeddings over a throwaway index:
+
+    python benchmarks/startup_benchmark.py --runs 5 --top-imports 10
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CHATBOT_DIR = os.path.dirname(BENCH_DIR)
+
+# Executed in a child process so every run pays the full import cost
+PROBE = """
+import json, time, asyncio
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+asyncio.run(app.warm_up())
+ready = time.perf_counter()
+
+import httpx
+async def first_request():
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+        response = await client.post("/chat", json={"query": "What AI solutions do you offer?"})
+        response.raise_for_status()
+asyncio.run(first_request())
+answered = time.perf_counter()
+
+print(json.dumps({
+    "import_s": imported - started,
+    "ready_s": ready - started,
+    "first_response_s": answered - started,
+    "warmup_error": app.startup["error"],
+}))
+"""
+
+
+# ------------------------
+# Setup
+# ------------------------
+def offline_env(workdir, args):
+    env = dict(os.environ)
+    env.setdefault("LLM_BACKEND", "fake")
+    env.setdefault("EMBEDDING_BACKEND", "hashing")
+    env.update({
+        "LANGCHAIN_TRACING_V2": "false",
+        "CHROMA_PATH": os.path.join(workdir, "chroma"),
+        "INGEST_METRICS_PATH": os.path.join(workdir, "ingest_metrics.prom"),
+        "CHAT_STATE_DB": os.path.join(workdir, "chat_state.sqlite3"),
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "CHAT_WARMUP": "false",  # the probe calls warm_up() itself and times it
+        "PYTHONWARNINGS": "ignore",
+    })
+    return env
+
+
+def build_index(env):
+    subprocess.run([sys.executable, "retriever.py"], cwd=CHATBOT_DIR, env=env, check=True, capture_output=True)
+
+
+# ------------------------
+# Measurements
+# ------------------------
+def measure(env):
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=CHATBOT_DIR, env=env, check=True,
+                            capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def top_imports(env, limit):
+    """Slowest top-level imports of app.py, from python -X importtime (cumulative microseconds)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=CHATBOT_DIR,
+                            env=env, check=True, capture_output=True, text=True)
+    # Children are printed before their parent, so collect depth-1 rows until "app" closes them
+    rows, pending = [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            pending.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            if name.strip() == "app":
+                rows = pending + [(int(cumulative), "app")]
+            pending = []
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="fake LLM latency for the first request")
+    parser.add_argument("--top-imports", type=int, default=0, help="also list the N slowest imports")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="chatbot_startup_") as workdir:
+        env = offline_env(workdir, args)
+        build_index(env)
+        runs = [measure(env) for _ in range(args.runs)]
+        imports = top_imports(env, args.top_imports) if args.top_imports else []
+
+    errors = [run["warmup_error"] for run in runs if run["warmup_error"]]
+    summary = {
+        key: {
+            "median": round(statistics.median(run[key] for run in runs), 3),
+            "min": round(min(run[key] for run in runs), 3),
+            "max": round(max(run[key] for run in runs), 3),
+        }
+        for key in ("import_s", "ready_s", "first_response_s")
+    }
+
+    print(f"\n{args.runs} cold starts (seconds from `import app`)")
+    print(f"{'phase':<20}{'median':>10}{'min':>10}{'max':>10}")
+    for key, r in summary.items():
+        print(f"{key:<20}{r['median']:>10.3f}{r['min']:>10.3f}{r['max']:>10.3f}")
+    if errors:
+        print(f"⚠️ Warm-up failed in {len(errors)} run(s): {errors[0]}")
+
+    if imports:
+        print(f"\n{'import':<40}{'ms':>10}")
+        for cumulative, name in imports:
+            print(f"{name:<40}{cumulative / 1000:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"runs": runs, "summary": summary, "top_imports": imports}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# vector_benchmark.py
+"""
+Top-k search latency and recall: memory-mapped snapshot (brute force and
+IVF at several nprobe values) against Chroma's HNSW index.
+
+Runs on synthetic clustered unit vectors, so it needs no API keys; recall is
+measured against exact brute-force results:
+
+    python benchmarks/vector_benchmark.py --vectors 20000 --dim 768 --ivf-lists 128 --chroma
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from vector_snapshot import SnapshotIndex, export_snapshot, read_current_version  # noqa: E402
+
+
+class ArrayStore:
+    """Just enough of the Chroma store API for export_snapshot()."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def get(self, include=None):
+        n = len(self.vectors)
+        return {
+            "ids": [f"doc-{i}" for i in range(n)],
+            "documents": [f"synthetic document {i}" for i in range(n)],
+            "metadatas": [{"row": i} for i in range(n)],
+            "embeddings": self.vectors,
+        }
+
+
+def synthetic_vectors(n, dim, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + rng.normal(scale=0.6, size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def timed_search(search, queries):
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(search(query))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, results
+
+
+def recall(results, truth):
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return hits / sum(len(t) for t in truth)
+
+
+def summarize(name, latencies, results, truth):
+    latencies = sorted(latencies)
+    return {
+        "method": name,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        "recall": round(recall(results, truth), 4),
+    }
+
+
+def chroma_search(vectors, workdir, k):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+    started = time.perf_counter()
+    ids = [f"doc-{i}" for i in range(len(vectors))]
+    for start in range(0, len(vectors), 5000):
+        collection.add(ids=ids[start:start + 5000], embeddings=vectors[start:start + 5000].tolist())
+    print(f"⏳ Chroma ingest: {time.perf_counter() - started:.1f}s")
+
+    def search(query):
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+        return [int(i.split("-")[1]) for i in result["ids"][0]]
+    return search
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--ivf-lists", type=int, default=128)
+    parser.add_argument("--nprobe", default="4,8,16,32", help="comma-separated nprobe values to try")
+    parser.add_argument("--chroma", action="store_true", help="also measure Chroma (slow to ingest)")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.vectors, args.dim, clusters=max(8, args.ivf_lists // 2))
+    queries = synthetic_vectors(args.queries, args.dim, clusters=max(8, args.ivf_lists // 2), seed=1)
+    rows = []
+
+    with tempfile.TemporaryDirectory(prefix="chatbot_vectors_") as workdir:
+        manifest = export_snapshot(ArrayStore(vectors), os.path.join(workdir, "snapshot"), ivf_lists=args.ivf_lists)
+        print(f"✅ Snapshot exported in {manifest['seconds']}s ({manifest['ivf_lists']} IVF lists)")
+
+        snapshot_dir = os.path.join(workdir, "snapshot")
+        started = time.perf_counter()
+        index = SnapshotIndex(os.path.join(snapshot_dir, read_current_version(snapshot_dir)))
+        print(f"✅ Snapshot opened (mmap) in {(time.perf_counter() - started) * 1000:.1f}ms")
+        row_ids = [int(i.split("-")[1]) for i in index.ids]  # rows are regrouped by IVF list
+
+        def snapshot_search(nprobe):
+            return lambda query: [row_ids[r] for r in index.search(query, args.k, nprobe)[0]]
+
+        brute_latencies, truth = timed_search(snapshot_search(args.ivf_lists), queries)
+        rows.append(summarize("snapshot brute force", brute_latencies, truth, truth))
+        for nprobe in (int(n) for n in args.nprobe.split(",") if n.strip()):
+            if nprobe < args.ivf_lists:
+                latencies, results = timed_search(snapshot_search(nprobe), queries)
+                rows.append(summarize(f"snapshot ivf nprobe={nprobe}", latencies, results, truth))
+
+        if args.chroma:
+            latencies, results = timed_search(chroma_search(vectors, workdir, args.k), queries)
+            rows.append(summarize("chroma hnsw", latencies, results, truth))
+
+    print(f"\n{args.vectors} vectors x {args.dim} dims, {args.queries} queries, top-{args.k}")
+    print(f"{'method':<28}{'p50 ms':>10}{'p95 ms':>10}{'recall':>10}")
+    for row in rows:
+        print(f"{row['method']:<28}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['recall']:>10.4f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# chunking.py
+import os
+import re
+
+from langchain_core.documents import Document
+
+# ------------------------
+# Configuration
+# ------------------------
+# structured: split on the "Field: value" lines every KB document is built from | legacy: 500/50 character splitter
+CHUNKING = os.getenv("CHUNKING", "structured").lower()
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "600"))
+# Per-section budgets: long narrative sections get more room, list-like ones stay tight
+SECTION_CHUNK_CHARS = {
+    "company": 700,
+    "solutions": 600,
+    "events": 500,
+    "projects": 500,
+    "articles": 800,
+    "feedback": 800,
+}
+
+# "Label: value" at the start of a line; labels are short and capitalised ("Use Cases", "Event 2")
+_FIELD_RE = re.compile(r"^([A-Z][A-Za-z0-9 &/()'-]{0,40}):[ \t]*(.*)$")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def chunk_limit(section):
+    return SECTION_CHUNK_CHARS.get(section, CHUNK_MAX_CHARS)
+
+
+# ------------------------
+# Field Parsing
+# ------------------------
+def parse_fields(text):
+    """[(label, value)] in order; lines that are not "Label: value" continue the previous field."""
+    fields = []
+    for line in text.split("\n"):
+        match = _FIELD_RE.match(line)
+        if match:
+            fields.append([match.group(1).strip(), match.group(2).strip()])
+        elif line.strip():
+            if fields:
+                fields[-1][1] = f"{fields[-1][1]}\n{line.strip()}".strip()
+            else:
+                fields.append(["", line.strip()])
+    return [(label, value) for label, value in fields]
+
+
+def render_field(label, value):
+    return f"{label}: {value}" if label else value
+
+
+def split_text(text, limit):
+    """Pieces of at most `limit` chars, broken at sentences, then list items, then words."""
+    if len(text) <= limit:
+        return [text]
+    for pattern in (_SENTENCE_RE, re.compile(r"(?<=[,;])\s+"), re.compile(r"\s+")):
+        parts = [p for p in pattern.split(text) if p]
+        if len(parts) > 1:
+            break
+    else:
+        # One unbreakable token: cut it rather than lose it
+        return [text[i:i + limit] for i in range(0, len(text), limit)]
+
+    pieces, current = [], ""
+    for part in parts:
+        if len(part) > limit:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.extend(split_text(part, limit))
+        elif current and len(current) + 1 + len(part) > limit:
+            pieces.append(current)
+            current = part
+        else:
+            current = f"{current} {part}" if current else part
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+# ------------------------
+# Structured Chunking
+# ------------------------
+def _chunk(doc, lines, labels, title):
+    metadata = dict(doc.metadata, fields=", ".join(label for label in labels if label))
+    if title:
+        metadata["title"] = title
+    return Document(page_content="\n".join(lines), metadata=metadata)
+
+
+def structured_chunks(doc):
+    """
+    Chunks of one KB document, following its fields.
+
+    Whole fields are packed together up to the section's budget, and each
+    chunk repeats the document's first line ("Solution 2: Smart Investment
+    Tracker") so it still says what it is about. A field too long for one
+    chunk is split at sentence boundaries. Nothing is dropped, however short;
+    only fields with no value are left out.
+    """
+    limit = chunk_limit(doc.metadata.get("section"))
+    fields = [(label, value) for label, value in parse_fields(doc.page_content) if value]
+    if not fields:
+        return []
+
+    header_label, title = fields[0]
+    header = render_field(header_label, title)
+    if len(header) > limit // 3:
+        header, title, body = "", "", fields  # no usable title line; don't repeat it
+    else:
+        body = fields[1:]
+
+    rendered = [render_field(label, value) for label, value in fields]
+    if len("\n".join(rendered)) <= limit:
+        chunk = _chunk(doc, rendered, [label for label, _ in fields], title)
+        chunk.metadata.update(chunk=0, chunks=1)
+        return [chunk]
+
+    prefix = [header] if header else []
+    prefix_labels = [header_label] if header else []
+
+    def size(lines):
+        return len("\n".join(prefix + lines))
+
+    # Groups of (lines, labels) below the title line; each becomes one chunk
+    groups = []
+    for label, value in body:
+        line = render_field(label, value)
+        if size([line]) > limit:
+            # Oversized field: split at sentences, every piece keeps the title and the label
+            room = max(limit - size([render_field(label, "")]) - 1, limit // 4)
+            groups.extend(([render_field(label, piece)], [label]) for piece in split_text(value, room))
+        else:
+            groups.append(([line], [label]))
+
+    # Pack neighbouring groups while they fit, so short fields share a chunk
+    packed = []
+    for lines, labels in groups:
+        if packed and size(packed[-1][0] + lines) <= limit:
+            packed[-1] = (packed[-1][0] + lines, packed[-1][1] + labels)
+        else:
+            packed.append((lines, labels))
+
+    chunks = [_chunk(doc, prefix + lines, prefix_labels + labels, title) for lines, labels in packed]
+    for i, chunk in enumerate(chunks):
+        chunk.metadata.update(chunk=i, chunks=len(chunks))
+    return chunks
+
+
+# ------------------------
+# Legacy Chunking
+# ------------------------
+def legacy_chunks(doc):
+    """The original 500/50 character split; chunks under 100 chars are discarded."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=500,
+        chunk_overlap=50,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""]
+    )
+    return [chunk for chunk in splitter.split_documents([doc]) if len(chunk.page_content) > 100]
+
+
+def split_documents(documents, strategy=CHUNKING):
+    if strategy == "structured":
+        chunker = structured_chunks
+    elif strategy == "legacy":
+        chunker = legacy_chunks
+    else:
+        raise ValueError(f"Unknown CHUNKING '{strategy}' (expected structured or legacy)")
+    return [chunk for doc in documents for chunk in chunker(doc)]
@@ -0,0 +1,149 @@
+# context_budget.py
+import os
+import re
+import math
+import logging
+
+from langchain_core.messages import SystemMessage
+
+logger = logging.getLogger("chatbot")
+
+# ------------------------
+# Configuration
+# ------------------------
+# Budgets are in estimated tokens (see count_tokens)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKENS", "1500"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("RAG_HISTORY_TOKENS", "600"))
+DEDUP_THRESHOLD = float(os.getenv("RAG_DEDUP_THRESHOLD", "0.8"))
+SHINGLE_SIZE = 3
+# Older questions kept (shortened) in the summary line when history is trimmed
+SUMMARY_MAX_QUESTIONS = 5
+SUMMARY_QUESTION_CHARS = 80
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\w+")
+
+
+# ------------------------
+# Local Token Counting
+# ------------------------
+def count_tokens(text):
+    """
+    Estimate tokens without a tokenizer call: one per punctuation mark and
+    roughly one per four characters of each word (never less than one).
+    Close enough to Gemini/GPT-style tokenizers for budgeting.
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _PIECE_RE.findall(text or ""))
+
+
+def truncate_to_tokens(text, max_tokens):
+    total = 0
+    for match in _PIECE_RE.finditer(text):
+        total += math.ceil(len(match.group()) / 4)
+        if total > max_tokens:
+            return text[:match.start()].rstrip() + " …"
+    return text
+
+
+# ------------------------
+# Near-duplicate Detection
+# ------------------------
+def shingles(text, size=SHINGLE_SIZE):
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def drop_near_duplicates(documents, threshold=DEDUP_THRESHOLD):
+    """Keep the first (best-ranked) of any group of chunks with overlapping word shingles."""
+    kept, kept_shingles = [], []
+    for doc in documents:
+        doc_shingles = shingles(doc.page_content)
+        if any(jaccard(doc_shingles, other) >= threshold for other in kept_shingles):
+            continue
+        kept.append(doc)
+        kept_shingles.append(doc_shingles)
+    return kept
+
+
+# ------------------------
+# Context Assembler
+# ------------------------
+class ContextAssembler:
+    """
+    Keeps the RAG prompt inside a token budget.
+
+    Retrieved chunks are de-duplicated and added in rank order until the
+    context budget is spent; chat history keeps the most recent turns that fit
+    and folds the older questions into a one-line summary.
+    """
+
+    def __init__(self, context_tokens=CONTEXT_TOKEN_BUDGET, history_tokens=HISTORY_TOKEN_BUDGET,
+                 dedup_threshold=DEDUP_THRESHOLD):
+        self.context_tokens = context_tokens
+        self.history_tokens = history_tokens
+        self.dedup_threshold = dedup_threshold
+
+    def select_documents(self, documents):
+        selected, used = [], 0
+        for doc in drop_near_duplicates(documents, self.dedup_threshold):
+            tokens = count_tokens(doc.page_content)
+            if used + tokens > self.context_tokens:
+                if not selected:
+                    # Never send an empty context because the top chunk is long
+                    doc = doc.model_copy(update={
+                        "page_content": truncate_to_tokens(doc.page_content, self.context_tokens)
+                    })
+                    selected.append(doc)
+                break
+            selected.append(doc)
+            used += tokens
+        return selected
+
+    def trim_history(self, chat_history):
+        kept, used = [], 0
+        for message in reversed(chat_history):
+            tokens = count_tokens(message.content)
+            if used + tokens > self.history_tokens:
+                break
+            kept.append(message)
+            used += tokens
+        kept.reverse()
+
+        # Don't start on a dangling AI reply
+        while kept and kept[0].type != "human":
+            kept.pop(0)
+
+        dropped = chat_history[:len(chat_history) - len(kept)]
+        summary = self.summarize(dropped)
+        return ([SystemMessage(content=summary)] if summary else []) + kept
+
+    def summarize(self, messages):
+        """Extractive summary of dropped turns: the user's earlier questions, shortened."""
+        questions = [m.content.strip() for m in messages if m.type == "human" and m.content.strip()]
+        if not questions:
+            return ""
+        recent = questions[-SUMMARY_MAX_QUESTIONS:]
+        shortened = [q if len(q) <= SUMMARY_QUESTION_CHARS else q[:SUMMARY_QUESTION_CHARS].rstrip() + "…"
+                     for q in recent]
+        return "Earlier in this conversation the user asked: " + "; ".join(shortened)
+
+    def log_prompt_size(self, inputs):
+        context = inputs.get("context") or []
+        history = inputs.get("chat_history") or []
+        context_tokens = sum(count_tokens(doc.page_content) for doc in context)
+        history_tokens = sum(count_tokens(m.content) for m in history)
+        input_tokens = count_tokens(inputs.get("input", ""))
+        logger.info(
+            "rag prompt tokens~%d (context=%d in %d chunks, history=%d in %d messages, input=%d)",
+            context_tokens + history_tokens + input_tokens,
+            context_tokens, len(context), history_tokens, len(history), input_tokens,
+        )
+        return inputs
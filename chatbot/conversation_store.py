@@ -0,0 +1,239 @@
+# conversation_store.py
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict, deque
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from state_backends import STATE_BACKEND, check_backend, get_database
+
+# ------------------------
+# Configuration
+# ------------------------
+SESSION_HEADER = "X-Session-ID"
+SESSION_COOKIE = "chat_session_id"
+
+MAX_MESSAGES_PER_SESSION = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "20"))
+SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL", "1800"))
+MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "10000"))
+MAX_MESSAGE_CHARS = int(os.getenv("CHAT_MAX_MESSAGE_CHARS", "4000"))
+# How often (seconds) a worker sweeps expired/excess sessions out of the SQLite store
+PRUNE_INTERVAL_SECONDS = int(os.getenv("CHAT_PRUNE_INTERVAL", "60"))
+
+MESSAGE_TYPES = {"human": HumanMessage, "ai": AIMessage, "system": SystemMessage}
+
+
+class _Session:
+    __slots__ = ("messages", "last_seen")
+
+    def __init__(self, max_messages):
+        self.messages = deque(maxlen=max_messages)
+        self.last_seen = time.monotonic()
+
+
+# ------------------------
+# Conversation Store
+# ------------------------
+class ConversationStore:
+    """
+    Per-session chat history kept in bounded ring buffers.
+
+    Sessions idle for longer than `ttl` seconds are evicted, and once
+    `max_sessions` is reached the least recently used session is dropped,
+    so memory stays at roughly max_sessions * max_messages messages.
+    """
+
+    def __init__(self, max_messages=MAX_MESSAGES_PER_SESSION, ttl=SESSION_TTL_SECONDS,
+                 max_sessions=MAX_SESSIONS, max_message_chars=MAX_MESSAGE_CHARS):
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_message_chars = max_message_chars
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now):
+        # Sessions are kept in last-seen order, so expired ones sit at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen < self.ttl:
+                break
+            del self._sessions[session_id]
+
+    def _touch(self, session_id):
+        now = time.monotonic()
+        self._evict_expired(now)
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = _Session(self.max_messages)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_seen = now
+        return session
+
+    def get_history(self, session_id, last_n=None):
+        with self._lock:
+            messages = list(self._touch(session_id).messages)
+        if last_n is not None:
+            messages = messages[-last_n:]
+        return messages
+
+    def append(self, session_id, *messages):
+        with self._lock:
+            session = self._touch(session_id)
+            for message in messages:
+                if len(message.content) > self.max_message_chars:
+                    message = message.__class__(content=message.content[:self.max_message_chars])
+                session.messages.append(message)
+
+    def reset(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return len(self._sessions)
+
+
+# ------------------------
+# SQLite Conversation Store (shared by workers)
+# ------------------------
+CONVERSATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    session_id TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_sessions_last_seen ON chat_sessions (last_seen);
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_messages_session ON chat_messages (session_id, id);
+"""
+
+
+class SQLiteConversationStore:
+    """
+    ConversationStore with the same limits, kept in a SQLite file so every
+    worker process on the host sees the same sessions.
+
+    Timestamps are wall-clock (time.time) because they are compared across
+    processes. Expired and excess sessions are swept at most once per
+    PRUNE_INTERVAL_SECONDS per worker.
+    """
+
+    def __init__(self, database=None, max_messages=MAX_MESSAGES_PER_SESSION, ttl=SESSION_TTL_SECONDS,
+                 max_sessions=MAX_SESSIONS, max_message_chars=MAX_MESSAGE_CHARS,
+                 prune_interval=PRUNE_INTERVAL_SECONDS):
+        self.db = database or get_database()
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_message_chars = max_message_chars
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self.db.ensure_schema(CONVERSATION_SCHEMA)
+
+    def _prune(self, conn, now):
+        if now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        conn.execute("DELETE FROM chat_sessions WHERE last_seen < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM chat_sessions WHERE session_id IN ("
+            " SELECT session_id FROM chat_sessions ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+        conn.execute(
+            "DELETE FROM chat_messages WHERE session_id NOT IN (SELECT session_id FROM chat_sessions)"
+        )
+
+    def _touch(self, conn, session_id, now):
+        row = conn.execute(
+            "SELECT last_seen FROM chat_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is not None and now - row[0] >= self.ttl:
+            conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+        conn.execute(
+            "INSERT INTO chat_sessions (session_id, last_seen) VALUES (?, ?)"
+            " ON CONFLICT(session_id) DO UPDATE SET last_seen = excluded.last_seen",
+            (session_id, now),
+        )
+
+    def get_history(self, session_id, last_n=None):
+        limit = self.max_messages if last_n is None else min(last_n, self.max_messages)
+        # A plain read: only append() refreshes last_seen, so reads never wait on the write lock
+        row = self.db.execute(
+            "SELECT last_seen FROM chat_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or time.time() - row[0] >= self.ttl:
+            return []
+        rows = self.db.execute(
+            "SELECT type, content FROM chat_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, limit),
+        ).fetchall()
+        return [MESSAGE_TYPES.get(kind, HumanMessage)(content=content) for kind, content in reversed(rows)]
+
+    def append(self, session_id, *messages):
+        now = time.time()
+        with self.db.transaction() as conn:
+            self._touch(conn, session_id, now)
+            conn.executemany(
+                "INSERT INTO chat_messages (session_id, type, content) VALUES (?, ?, ?)",
+                [(session_id, m.type, m.content[:self.max_message_chars]) for m in messages],
+            )
+            # Ring buffer: keep only the newest max_messages rows of this session
+            conn.execute(
+                "DELETE FROM chat_messages WHERE session_id = ? AND id NOT IN ("
+                " SELECT id FROM chat_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, self.max_messages),
+            )
+            self._prune(conn, now)
+
+    def reset(self, session_id):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+
+    def __len__(self):
+        row = self.db.execute(
+            "SELECT COUNT(*) FROM chat_sessions WHERE last_seen >= ?", (time.time() - self.ttl,)
+        ).fetchone()
+        return row[0]
+
+
+def create_conversation_store(backend=STATE_BACKEND):
+    if check_backend(backend) == "sqlite":
+        return SQLiteConversationStore()
+    return ConversationStore()
+
+
+# ------------------------
+# Session ID helpers
+# ------------------------
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+def get_session_id(request):
+    """Return (session_id, is_new) from the X-Session-ID header or session cookie."""
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    if session_id:
+        session_id = session_id.strip()[:64]
+    if session_id:
+        return session_id, False
+    return new_session_id(), True
+
+
+def attach_session_id(response, session_id):
+    response.headers[SESSION_HEADER] = session_id
+    response.set_cookie(SESSION_COOKIE, session_id, max_age=SESSION_TTL_SECONDS,
+                        httponly=True, samesite="lax")
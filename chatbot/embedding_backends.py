@@ -0,0 +1,134 @@
+# embedding_backends.py
+import os
+import re
+import zlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# ------------------------
+# Configuration
+# ------------------------
+# google: Gemini API (default) | hashing: local NumPy feature hashing | sentence-transformers: local CPU model
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "google").lower()
+if EMBEDDING_BACKEND == "local":
+    EMBEDDING_BACKEND = "sentence-transformers"
+GOOGLE_EMBEDDING_MODEL = "models/gemini-embedding-001"
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+HASHING_DIMENSIONS = int(os.getenv("HASHING_EMBEDDING_DIM", "1024"))
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+
+BASE_COLLECTION_NAME = "ai_knowledge"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+# ------------------------
+# Hashing Embeddings (no model, no network)
+# ------------------------
+class HashingEmbeddings(Embeddings):
+    """
+    Signed feature hashing over word unigrams, bigrams and character trigrams.
+
+    Deterministic across processes (crc32, not Python's salted hash), so
+    vectors written by retriever.py match the ones computed at query time.
+    """
+
+    def __init__(self, dimensions=HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _features(self, text):
+        words = _TOKEN_RE.findall(text.lower())
+        features = list(words)
+        features += [f"{a}_{b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return features
+
+    def _embed(self, texts):
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                cols.append(h % self.dimensions)
+                signs.append(1.0 if h & 0x80000000 else -1.0)
+        if rows:
+            np.add.at(matrix, (np.array(rows), np.array(cols)), np.array(signs, dtype=np.float32))
+
+        # Sublinear term frequency, then L2-normalise so dot product == cosine
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._embed([text])[0].tolist()
+
+
+# ------------------------
+# Sentence-Transformers Embeddings (local CPU model)
+# ------------------------
+class SentenceTransformerEmbeddings(Embeddings):
+    def __init__(self, model_name=LOCAL_EMBEDDING_MODEL, batch_size=LOCAL_EMBEDDING_BATCH_SIZE):
+        # Optional dependency: pip install sentence-transformers
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def _embed(self, texts):
+        return self.model.encode(
+            texts, batch_size=self.batch_size, convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32)
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._embed([text])[0].tolist()
+
+
+# ------------------------
+# Backend Selection
+# ------------------------
+def is_remote_backend(backend=None):
+    return (backend or EMBEDDING_BACKEND) == "google"
+
+
+def embedding_model_id(backend=None):
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "google":
+        return GOOGLE_EMBEDDING_MODEL
+    if backend == "hashing":
+        return f"hashing-{HASHING_DIMENSIONS}"
+    return LOCAL_EMBEDDING_MODEL
+
+
+def collection_name(backend=None):
+    # Each backend, model and dimension is its own vector space, so each gets its own collection
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "google":
+        return BASE_COLLECTION_NAME
+    if backend == "hashing":
+        return f"{BASE_COLLECTION_NAME}_hashing_{HASHING_DIMENSIONS}"
+    # Model ids contain "/" and can be long: keep a readable tail plus a checksum of the full id
+    tail = re.sub(r"[^a-z0-9]+", "_", LOCAL_EMBEDDING_MODEL.rsplit("/", 1)[-1].lower()).strip("_")[:32]
+    return f"{BASE_COLLECTION_NAME}_{backend.replace('-', '_')}_{tail}_{zlib.crc32(LOCAL_EMBEDDING_MODEL.encode()):08x}"
+
+
+def get_embedding_function(backend=None):
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        return GoogleGenerativeAIEmbeddings(model=GOOGLE_EMBEDDING_MODEL)
+    if backend == "hashing":
+        return HashingEmbeddings()
+    if backend == "sentence-transformers":
+        return SentenceTransformerEmbeddings()
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}' (expected google, hashing or sentence-transformers)")
@@ -0,0 +1,116 @@
+# embedding_pipeline.py
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from langchain_core.embeddings import Embeddings
+
+from rate_limit import TokenBucketLimiter
+
+# ------------------------
+# Configuration
+# ------------------------
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_MAX_WORKERS = int(os.getenv("EMBED_MAX_WORKERS", "4"))
+EMBED_REQUESTS_PER_MINUTE = float(os.getenv("EMBED_REQUESTS_PER_MINUTE", "60"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+EMBED_BACKOFF_SECONDS = float(os.getenv("EMBED_BACKOFF_SECONDS", "2"))
+
+
+# ------------------------
+# Batch Embedding Pipeline
+# ------------------------
+class BatchEmbeddingPipeline(Embeddings):
+    """
+    Embeds documents in fixed-size batches on a bounded thread pool.
+
+    Every batch waits for a rate-limit token and is retried with exponential
+    backoff. Wrap a CacheBackedEmbeddings to checkpoint: each finished batch is
+    written to the cache straight away, so a failed run resumes where it stopped.
+    Any Embeddings works as `embeddings`, including langchain_core's
+    DeterministicFakeEmbedding for offline runs.
+    """
+
+    def __init__(self, embeddings, batch_size=EMBED_BATCH_SIZE, max_workers=EMBED_MAX_WORKERS,
+                 requests_per_minute=EMBED_REQUESTS_PER_MINUTE, max_retries=EMBED_MAX_RETRIES,
+                 backoff_seconds=EMBED_BACKOFF_SECONDS, report=print):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        # One bucket shared by the worker threads; bursts up to a second's worth of requests
+        self.limiter = TokenBucketLimiter(requests_per_minute, burst=int(requests_per_minute / 60.0))
+        self.report = report
+        self.last_run = {}
+        self._retries = 0
+        self._retries_lock = threading.Lock()
+
+    def _wait_for_token(self):
+        while True:
+            allowed, retry_after = self.limiter.acquire("embeddings")
+            if allowed:
+                return
+            time.sleep(retry_after)
+
+    def _embed_batch(self, batch):
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_token()
+            try:
+                return self.embeddings.embed_documents(batch)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * (0.5 + random.random())
+                with self._retries_lock:
+                    self._retries += 1
+                if self.report:
+                    self.report(f"⚠️ Embedding batch failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = [None] * len(batches)
+        errors = []
+        done = 0
+        started = time.monotonic()
+        self._retries = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._embed_batch, batch): i for i, batch in enumerate(batches)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                done += len(batches[i])
+                if self.report:
+                    elapsed = time.monotonic() - started
+                    self.report(f"⏳ Embedded {done}/{len(texts)} chunks ({done / elapsed if elapsed else 0:.1f} chunks/sec)")
+
+        elapsed = time.monotonic() - started
+        self.last_run = {
+            "chunks": len(texts),
+            "embedded": done,
+            "batches": len(batches),
+            "failed_batches": len(errors),
+            "retries": self._retries,
+            "seconds": elapsed,
+            "chunks_per_second": done / elapsed if elapsed else 0.0,
+        }
+        if errors:
+            # Completed batches are already checkpointed; re-running picks up the rest
+            raise errors[0]
+
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,96 @@
+# fake_llm.py
+import os
+import re
+import time
+import asyncio
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from context_budget import count_tokens
+
+# ------------------------
+# Configuration
+# ------------------------
+# Simulated model latency: once per call, then per streamed token
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "200"))
+FAKE_LLM_TOKEN_LATENCY_MS = float(os.getenv("FAKE_LLM_TOKEN_LATENCY_MS", "5"))
+
+FAKE_ANSWER = (
+    "At AI Solutions, we help teams put AI to work on real business problems. "
+    "Our team can walk you through the solutions, recent projects and upcoming events "
+    "that match your needs. What would you like to explore next?"
+)
+
+
+# ------------------------
+# Fake Chat Model
+# ------------------------
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for Gemini (LLM_BACKEND=fake) for load tests and offline runs.
+
+    Answers the classifier with KNOWLEDGE, the standalone-question prompt with
+    the latest question unchanged, and everything else with a fixed answer,
+    after sleeping `latency_ms` (plus `token_latency_ms` per streamed token).
+    """
+
+    latency_ms: float = FAKE_LLM_LATENCY_MS
+    token_latency_ms: float = FAKE_LLM_TOKEN_LATENCY_MS
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _reply(self, messages):
+        last = messages[-1].content if messages else ""
+        if "CASUAL or KNOWLEDGE" in last:
+            return "KNOWLEDGE"
+        system = messages[0].content if messages and messages[0].type == "system" else ""
+        if "standalone question" in system:
+            return last
+        return FAKE_ANSWER
+
+    def _usage(self, messages, text):
+        # Estimated the same way as the prompt budget, so token metrics move in a load test
+        input_tokens = sum(count_tokens(str(m.content)) for m in messages)
+        output_tokens = count_tokens(text)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def _result(self, messages):
+        text = self._reply(messages)
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency_ms / 1000)
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._result(messages)
+
+    def _chunks(self, messages):
+        text = self._reply(messages)
+        tokens = re.findall(r"\S+\s*", text)
+        for i, token in enumerate(tokens):
+            usage = self._usage(messages, text) if i == len(tokens) - 1 else None
+            yield token, ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency_ms / 1000)
+        for token, chunk in self._chunks(messages):
+            time.sleep(self.token_latency_ms / 1000)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency_ms / 1000)
+        for token, chunk in self._chunks(messages):
+            await asyncio.sleep(self.token_latency_ms / 1000)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
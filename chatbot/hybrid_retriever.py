@@ -0,0 +1,197 @@
+# hybrid_retriever.py
+import os
+import re
+import math
+import heapq
+import threading
+from collections import Counter, defaultdict
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from answer_cache import read_kb_version
+
+# ------------------------
+# Configuration
+# ------------------------
+RETRIEVER_MODE = os.getenv("RETRIEVER_MODE", "hybrid").lower()  # hybrid | vector
+RETRIEVER_K = int(os.getenv("RETRIEVER_K", "5"))
+RETRIEVER_FETCH_K = int(os.getenv("RETRIEVER_FETCH_K", "20"))
+RRF_K = int(os.getenv("RETRIEVER_RRF_K", "60"))
+RERANKER = os.getenv("RERANKER", "none").lower()  # none | lexical | cross-encoder
+CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or our "
+    "the to was we what when where which who why with you your about tell".split()
+)
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def doc_key(doc):
+    # Content, not id: Chroma results and BM25 results must agree on identity
+    return doc.page_content
+
+
+# ------------------------
+# BM25 Inverted Index
+# ------------------------
+class BM25Index:
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(doc_index, term_frequency)]
+        self.doc_lengths = []
+
+        for i, doc in enumerate(self.documents):
+            counts = Counter(tokenize(doc.page_content))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+
+        n_docs = len(self.documents)
+        self.avg_length = (sum(self.doc_lengths) / n_docs) if n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    @classmethod
+    def from_vector_store(cls, vector_store):
+        data = vector_store.get(include=["documents", "metadatas"])
+        return cls(
+            Document(id=doc_id, page_content=text, metadata=metadata or {})
+            for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+        )
+
+    def search(self, query, k):
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / (self.avg_length or 1))
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [self.documents[i] for i, _ in best]
+
+
+# ------------------------
+# Rerankers
+# ------------------------
+class LexicalReranker:
+    """Cheap local reranker: query-term coverage plus a bonus for exact phrase matches."""
+
+    def rerank(self, query, documents):
+        terms = set(tokenize(query))
+        phrase = " ".join(tokenize(query))
+
+        def score(doc):
+            text = doc.page_content.lower()
+            doc_terms = set(tokenize(text))
+            coverage = len(terms & doc_terms) / len(terms) if terms else 0.0
+            return coverage + (0.5 if phrase and phrase in " ".join(tokenize(text)) else 0.0)
+
+        # Stable sort keeps the fused order among equal scores
+        return sorted(documents, key=score, reverse=True)
+
+
+class CrossEncoderReranker:
+    def __init__(self, model_name=CROSS_ENCODER_MODEL):
+        # Optional dependency: pip install sentence-transformers
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def rerank(self, query, documents):
+        if not documents:
+            return documents
+        scores = self.model.predict([(query, doc.page_content) for doc in documents])
+        order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)
+        return [documents[i] for i in order]
+
+
+def get_reranker(name=RERANKER):
+    if name in ("", "none"):
+        return None
+    if name == "lexical":
+        return LexicalReranker()
+    if name == "cross-encoder":
+        return CrossEncoderReranker()
+    raise ValueError(f"Unknown RERANKER '{name}' (expected none, lexical or cross-encoder)")
+
+
+# ------------------------
+# Reciprocal Rank Fusion
+# ------------------------
+def reciprocal_rank_fusion(result_lists, rrf_k=RRF_K):
+    scores = defaultdict(float)
+    documents = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = doc_key(doc)
+            scores[key] += 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, doc)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+# ------------------------
+# Hybrid Retriever
+# ------------------------
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses Chroma similarity results with BM25 keyword results (RRF), then
+    optionally reranks the fused candidates before keeping the top `k`.
+
+    The BM25 index is built from the same collection and rebuilt when
+    retriever.py publishes a new knowledge-base version.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: object
+    persist_directory: str = ""
+    k: int = RETRIEVER_K
+    fetch_k: int = RETRIEVER_FETCH_K
+    rrf_k: int = RRF_K
+    reranker: object = None
+
+    _bm25: object = None
+    _kb_version: object = None
+    _lock: object = None
+
+    def model_post_init(self, __context):
+        self._lock = threading.Lock()
+
+    def _bm25_index(self):
+        version = read_kb_version(self.persist_directory) if self.persist_directory else None
+        with self._lock:
+            if self._bm25 is None or version != self._kb_version:
+                self._bm25 = BM25Index.from_vector_store(self.vector_store)
+                self._kb_version = version
+            return self._bm25
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        vector_results = self.vector_store.similarity_search(query, k=self.fetch_k)
+        keyword_results = self._bm25_index().search(query, self.fetch_k)
+        fused = reciprocal_rank_fusion([vector_results, keyword_results], rrf_k=self.rrf_k)
+        if self.reranker is not None:
+            fused = self.reranker.rerank(query, fused[:self.fetch_k])
+        return fused[:self.k]
+
+
+def build_retriever(vector_store, persist_directory="", mode=RETRIEVER_MODE):
+    if mode == "vector":
+        return vector_store.as_retriever(search_type="similarity", search_kwargs={"k": RETRIEVER_K})
+    return HybridRetriever(
+        vector_store=vector_store,
+        persist_directory=persist_directory,
+        reranker=get_reranker(),
+    )
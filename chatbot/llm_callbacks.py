@@ -0,0 +1,142 @@
+# llm_callbacks.py
+import time
+import threading
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# ------------------------
+# Per-request LLM Call Counter
+# ------------------------
+class LLMCallCounter(BaseCallbackHandler):
+    """
+    Counts the LLM calls, and the tokens they report, made while answering one request.
+
+    Pass a fresh instance in the run config: {"callbacks": [counter, ...]}.
+    """
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def _count(self):
+        with self._lock:
+            self.llm_calls += 1
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._count()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._count()
+
+    def on_llm_end(self, response, **kwargs):
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+
+# ------------------------
+# Per-request Stage Timer
+# ------------------------
+class StageTimer(BaseCallbackHandler):
+    """
+    Wall time per pipeline stage for one request.
+
+    `classify` is timed explicitly by the caller (router + optional LLM), and
+    so is `build`, the lazy chain build on a worker's first request;
+    `rewrite` and `retrieve` come from the named runs in rag_pipeline; every
+    other LLM call is `generate`. Nested runs are attributed to the stage of
+    their parent, so the rewrite's LLM call is not counted twice.
+    """
+
+    STAGES = ("classify", "rewrite", "retrieve", "generate")
+    RUN_STAGES = {"classify_query": "classify", "contextualize_question": "rewrite"}
+
+    def __init__(self):
+        self.durations = {}
+        self.started_at = time.perf_counter()
+        self._runs = {}  # run_id -> (stage, start or None when nested)
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def _start(self, run_id, parent_run_id, stage):
+        with self._lock:
+            parent = self._runs.get(parent_run_id)
+            if parent is not None:
+                # Inherit the parent's stage; only the outermost run is timed
+                self._runs[run_id] = (parent[0], None)
+            elif stage is not None:
+                self._runs[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id):
+        with self._lock:
+            stage, started = self._runs.pop(run_id, (None, None))
+        # classify is timed by the caller, around the router as well as the LLM
+        if started is not None and stage != "classify":
+            self.add(stage, time.perf_counter() - started)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self.RUN_STAGES.get(kwargs.get("name")))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "retrieve")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "generate")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "generate")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def total(self):
+        return time.perf_counter() - self.started_at
+
+    def as_dict(self):
+        """Milliseconds per stage, plus the request total."""
+        with self._lock:
+            timings = {stage: round(self.durations.get(stage, 0.0) * 1000, 2) for stage in self.STAGES}
+            # Occasional stages such as `build` only appear when they ran
+            timings.update((stage, round(seconds * 1000, 2)) for stage, seconds in self.durations.items()
+                           if stage not in timings)
+        timings["total"] = round(self.total() * 1000, 2)
+        return timings
+
+    def server_timing(self):
+        return ", ".join(f"{stage};dur={ms}" for stage, ms in self.as_dict().items())
@@ -0,0 +1,124 @@
+# query_rewriter.py
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict, Counter
+
+from langchain_core.runnables import RunnableLambda
+
+# ------------------------
+# Configuration
+# ------------------------
+REWRITE_CACHE_SIZE = int(os.getenv("REWRITE_CACHE_SIZE", "1024"))
+# Follow-ups this short ("and finance?") are treated as referring back
+SHORT_FOLLOW_UP_WORDS = int(os.getenv("REWRITE_SHORT_FOLLOW_UP_WORDS", "3"))
+
+# Pronouns that only make sense with earlier turns, and openers that continue one.
+# Demonstratives count only as a bare pronoun ("tell me about that"), not before a noun
+# ("this platform"), and common words like "more" or "other" are left out on purpose:
+# most standalone questions contain them, and each false match costs an LLM call.
+ANAPHORA_RE = re.compile(
+    r"\b(?:it|its|it's|they|them|their|theirs|he|him|his|she|her|hers)\b"
+    r"|\b(?:this|that|these|those)\s*[?.!]*\s*$"
+    r"|^\s*(?:and|also|but|what about|how about)\b",
+    re.IGNORECASE,
+)
+_WORD_RE = re.compile(r"\w+")
+
+
+def history_digest(chat_history):
+    h = hashlib.sha256()
+    for message in chat_history:
+        h.update(message.type.encode("utf-8"))
+        h.update(b"\x00")
+        h.update(message.content.encode("utf-8"))
+        h.update(b"\x01")
+    return h.hexdigest()
+
+
+# ------------------------
+# Query Rewriter
+# ------------------------
+class QueryRewriter:
+    """
+    Decides whether a knowledge question needs the history-aware rewrite LLM call.
+
+    The rewrite is skipped when there is no history or the question stands on
+    its own (no pronouns/anaphora and not a bare follow-up), and rewrites are
+    cached per (history digest, query).
+    """
+
+    def __init__(self, max_entries=REWRITE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def needs_rewrite(query, chat_history):
+        if not chat_history:
+            return False
+        if ANAPHORA_RE.search(query):
+            return True
+        return len(_WORD_RE.findall(query)) <= SHORT_FOLLOW_UP_WORDS
+
+    def _lookup(self, key):
+        with self._lock:
+            rewritten = self._cache.get(key)
+            if rewritten is not None:
+                self._cache.move_to_end(key)
+                self._counts["cached"] += 1
+            return rewritten
+
+    def _store(self, key, rewritten):
+        with self._lock:
+            self._counts["rewritten"] += 1
+            self._cache[key] = rewritten
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _skip(self, inputs):
+        query = inputs["input"]
+        chat_history = inputs.get("chat_history") or []
+        if self.needs_rewrite(query, chat_history):
+            return query, (history_digest(chat_history), query)
+        with self._lock:
+            self._counts["skipped"] += 1
+        return query, None
+
+    def runnable(self, rewrite_chain):
+        """Runnable mapping {"input", "chat_history"} to a standalone query string."""
+
+        def contextualize(inputs, config):
+            query, key = self._skip(inputs)
+            if key is None:
+                return query
+            rewritten = self._lookup(key)
+            if rewritten is None:
+                rewritten = rewrite_chain.invoke(inputs, config=config).strip() or query
+                self._store(key, rewritten)
+            return rewritten
+
+        async def acontextualize(inputs, config):
+            query, key = self._skip(inputs)
+            if key is None:
+                return query
+            rewritten = self._lookup(key)
+            if rewritten is None:
+                rewritten = (await rewrite_chain.ainvoke(inputs, config=config)).strip() or query
+                self._store(key, rewritten)
+            return rewritten
+
+        return RunnableLambda(contextualize, afunc=acontextualize, name="contextualize_question")
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            size = len(self._cache)
+        return {
+            "skipped": counts.get("skipped", 0),
+            "cached": counts.get("cached", 0),
+            "rewritten": counts.get("rewritten", 0),
+            "cache_size": size,
+        }
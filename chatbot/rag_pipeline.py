@@ -1,30 +1,51 @@
 # rag_pipeline.py
 import os
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+import embedding_backends
+from query_rewriter import QueryRewriter
+from context_budget import ContextAssembler
 
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_API_KEY"] = os.getenv("LANGCHAIN_API_KEY")
+# LangSmith tracing only when a key is configured (offline runs and benchmarks work without one)
+if os.getenv("LANGCHAIN_API_KEY"):
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
 os.environ["LANGCHAIN_PROJECT"] = "AI FAQ"
 
 # Vector store path
-CHROMA_PATH = "data1/ai"
+CHROMA_PATH = os.getenv("CHROMA_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data1/ai"))
+# chroma: chromadb client per worker | snapshot: memory-mapped export shared through the page cache
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+# google: Gemini | fake: deterministic local model for load tests (see fake_llm.py)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "google").lower()
 
 # ------------------------
 # Load Vector Store
 # ------------------------
+def get_embedding_function():
+    # Selected by EMBEDDING_BACKEND; must match the backend retriever.py indexed with
+    return embedding_backends.get_embedding_function()
+
 def load_vector_store():
-    embedding_function = GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001")
+    embedding_function = get_embedding_function()
+    if VECTOR_BACKEND == "snapshot":
+        from vector_snapshot import SnapshotVectorStore, snapshot_directory
+        return SnapshotVectorStore(
+            snapshot_directory(CHROMA_PATH, embedding_backends.collection_name()),
+            embedding_function,
+            model=embedding_backends.embedding_model_id(),
+        )
+    if VECTOR_BACKEND != "chroma":
+        raise ValueError(f"Unknown VECTOR_BACKEND '{VECTOR_BACKEND}' (expected chroma or snapshot)")
+
+    # Deferred: chromadb adds about a second to import time
+    from langchain_chroma import Chroma
+
     vector_store = Chroma(
-        collection_name="ai_knowledge",
+        collection_name=embedding_backends.collection_name(),
         embedding_function=embedding_function,
         persist_directory=CHROMA_PATH
     )
@@ -38,6 +59,12 @@ def load_vector_store():
 # Initialize LLM
 # ------------------------
 def setup_generator():
+    if LLM_BACKEND == "fake":
+        from fake_llm import FakeChatModel
+        return FakeChatModel()
+    # Deferred: the Google GenAI SDK is the slowest import in the service
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     llm = ChatGoogleGenerativeAI(
         model="gemini-2.0-flash",
         google_api_key=GOOGLE_API_KEY,
@@ -55,16 +82,25 @@ def create_classifier(llm):
     Respond only with: CASUAL or KNOWLEDGE.
     Message: {input}
     """)
-    chain = classifier_prompt | llm | StrOutputParser()
+    chain = (classifier_prompt | llm | StrOutputParser()).with_config(run_name="classify_query")
     return chain
 
 # ------------------------
 # Create RAG Pipeline
 # ------------------------
-def create_rag_pipeline():
-    # Setup LLM & vector store
-    llm = setup_generator()
-    vector_store = load_vector_store()
+def build_default_retriever():
+    from hybrid_retriever import build_retriever
+
+    # BM25 + vector fusion unless RETRIEVER_MODE=vector
+    return build_retriever(load_vector_store(), persist_directory=CHROMA_PATH)
+
+def create_rag_pipeline(query_rewriter=None, context_assembler=None, llm=None, retriever=None):
+    from langchain.chains import create_retrieval_chain
+    from langchain.chains.combine_documents import create_stuff_documents_chain
+
+    # Setup LLM & retriever (pass `llm` to share one client with the casual chain)
+    llm = llm or setup_generator()
+    retriever = retriever or build_default_retriever()
 
     # History-aware retriever prompt
     context_q_system_prompt = """
@@ -95,22 +131,32 @@ Context: {context}"""),
         ("human", "{input}")
     ])
 
-    # Retriever and RAG chain
-    retriever = vector_store.as_retriever(
-        search_type="similarity",
-        search_kwargs={"k": 5}
+    # Standalone-question rewrite only for follow-ups that refer back to the history
+    query_rewriter = query_rewriter or QueryRewriter()
+    rewrite_chain = context_q_prompt | llm | StrOutputParser()
+    history_aware_retriever = query_rewriter.runnable(rewrite_chain) | retriever
+
+    # Token budget: de-duplicated chunks up to RAG_CONTEXT_TOKENS, recent history up to RAG_HISTORY_TOKENS
+    context_assembler = context_assembler or ContextAssembler()
+    budgeted_retriever = history_aware_retriever | RunnableLambda(context_assembler.select_documents)
+    question_answer_chain = (
+        RunnableLambda(context_assembler.log_prompt_size)
+        | create_stuff_documents_chain(llm, qa_prompt)
+    )
+    rag_chain = (
+        RunnablePassthrough.assign(
+            chat_history=lambda x: context_assembler.trim_history(x.get("chat_history") or [])
+        )
+        | create_retrieval_chain(budgeted_retriever, question_answer_chain)
     )
-    history_aware_retriever = create_history_aware_retriever(llm, retriever, context_q_prompt)
-    question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
-    rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
 
     return rag_chain, llm
 
 # ------------------------
 # Create Casual Chain
 # ------------------------
-def create_casual_chain():
-    llm = setup_generator()
+def create_casual_chain(llm=None):
+    llm = llm or setup_generator()
     casual_prompt = ChatPromptTemplate.from_messages([
         ("system", """As a proud AI Solutions team member, respond to casual queries with professional poise and genuine warmth—like a colleague sharing insights over coffee. Keep it brief, polished, and tied to our world of innovation. End with an inviting question linking back to our services.
 
@@ -128,9 +174,26 @@ Be supportive, expert, and subtly promotional."""),
 # ------------------------
 # Utility to run RAG query
 # ------------------------
-def run_rag_query(rag_chain, query, chat_history):
+def run_rag_query(rag_chain, query, chat_history, config=None):
     response = rag_chain.invoke({
         "input": query,
         "chat_history": chat_history
-    })
+    }, config=config)
     return response["answer"]
+
+async def arun_rag_query(rag_chain, query, chat_history, config=None):
+    response = await rag_chain.ainvoke({
+        "input": query,
+        "chat_history": chat_history
+    }, config=config)
+    return response["answer"]
+
+async def astream_rag_query(rag_chain, query, chat_history, config=None):
+    # create_retrieval_chain streams dict chunks; only the "answer" ones carry tokens
+    async for chunk in rag_chain.astream({
+        "input": query,
+        "chat_history": chat_history
+    }, config=config):
+        token = chunk.get("answer")
+        if token:
+            yield token
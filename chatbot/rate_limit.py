@@ -0,0 +1,165 @@
+# rate_limit.py
+import os
+import time
+import asyncio
+import threading
+import ipaddress
+import contextlib
+from collections import OrderedDict
+
+# ------------------------
+# Configuration
+# ------------------------
+# Requests per minute and burst size; a rate of 0 turns that limit off
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("CHAT_RATE_LIMIT_IP_PER_MINUTE", "60"))
+RATE_LIMIT_IP_BURST = int(os.getenv("CHAT_RATE_LIMIT_IP_BURST", "20"))
+RATE_LIMIT_SESSION_PER_MINUTE = float(os.getenv("CHAT_RATE_LIMIT_SESSION_PER_MINUTE", "20"))
+RATE_LIMIT_SESSION_BURST = int(os.getenv("CHAT_RATE_LIMIT_SESSION_BURST", "5"))
+# Buckets tracked per limiter; the least recently seen key is dropped beyond this
+RATE_LIMIT_MAX_KEYS = int(os.getenv("CHAT_RATE_LIMIT_MAX_KEYS", "50000"))
+
+
+def parse_networks(values):
+    return [ipaddress.ip_network(v.strip(), strict=False) for v in values if v.strip()]
+
+
+# Comma-separated proxy addresses/networks (e.g. the Django site) whose X-Forwarded-For is believed
+TRUSTED_PROXIES = parse_networks(os.getenv("CHAT_TRUSTED_PROXIES", "").split(","))
+
+
+def _is_trusted(address, trusted):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted)
+
+
+def forwarded_client(peer, forwarded_for, trusted=TRUSTED_PROXIES):
+    """
+    Address to rate limit on.
+
+    Behind a trusted proxy, the right-most X-Forwarded-For entry that is not
+    itself a trusted proxy; otherwise the socket peer, since the header is
+    trivially forged.
+    """
+    if not _is_trusted(peer, trusted):
+        return peer
+    forwarded = [a.strip() for a in (forwarded_for or "").split(",") if a.strip()]
+    for address in reversed(forwarded):
+        if not _is_trusted(address, trusted):
+            return address
+    return peer
+
+
+def client_ip(request):
+    """forwarded_client() for a FastAPI request."""
+    peer = request.client.host if request.client else "unknown"
+    return forwarded_client(peer, request.headers.get("X-Forwarded-For", ""))
+
+
+# ------------------------
+# Token Bucket Limiter (in-memory, per worker)
+# ------------------------
+class TokenBucketLimiter:
+    """
+    One token bucket per key: `burst` requests at once, refilled at `per_minute`.
+
+    Buckets live in process memory, so with N workers a client gets up to N
+    times the limit; keep the numbers per worker.
+    """
+
+    def __init__(self, per_minute, burst, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        self.enabled = per_minute > 0
+        self._buckets = OrderedDict()  # key -> [tokens, last_refill]
+        self._lock = threading.Lock()
+
+    def _refill(self, key, now):
+        # Caller holds self._lock
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def acquire(self, key, cost=1):
+        """Take `cost` tokens; returns (allowed, retry_after_seconds)."""
+        refused, retry_after = acquire_all([(self, key)], cost)
+        return refused is None, retry_after
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def acquire_all(claims, cost=1):
+    """
+    Take `cost` tokens from every (limiter, key) in `claims`, or from none.
+
+    Returns (None, 0.0) when allowed, else (the index of the claim that waits
+    longest, retry_after_seconds). A request one bucket refuses leaves the
+    others untouched, so a throttled session doesn't drain its IP's budget.
+    """
+    claims = list(claims)
+    # Lock every bucket first, always in the same order, so the check and the take are one step
+    limiters = sorted({id(limiter): limiter for limiter, _ in claims if limiter.enabled}.values(), key=id)
+    now = time.monotonic()
+    with contextlib.ExitStack() as stack:
+        for limiter in limiters:
+            stack.enter_context(limiter._lock)
+        buckets = {}
+        refused, longest = None, 0.0
+        for index, (limiter, key) in enumerate(claims):
+            if not limiter.enabled:
+                continue
+            bucket = buckets[index] = limiter._refill(key, now)
+            if bucket[0] < cost:
+                retry_after = (cost - bucket[0]) / limiter.rate
+                if refused is None or retry_after > longest:
+                    refused, longest = index, retry_after
+        if refused is not None:
+            return refused, longest
+        for bucket in buckets.values():
+            bucket[0] -= cost
+    return None, 0.0
+
+
+# ------------------------
+# Request Coalescing
+# ------------------------
+class RequestCoalescer:
+    """
+    Concurrent calls with the same key share one in-flight computation.
+
+    The first caller (the leader) runs the work as a task; callers arriving
+    before it finishes await the same task. The task is shielded, so a
+    client that disconnects does not cancel the answer for the others.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def run(self, key, factory):
+        """Returns (result, shared): shared is True when another caller did the work."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.followers += 1
+            return await asyncio.shield(task), True
+
+        self.leaders += 1
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+    def stats(self):
+        return {"leaders": self.leaders, "followers": self.followers, "in_flight": len(self._inflight)}
@@ -1,23 +1,39 @@
 import os
 import json
-import pandas as pd
+import time
+import uuid
+import hashlib
 from dotenv import load_dotenv
-from langchain.vectorstores import Chroma
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from langchain_chroma import Chroma
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
 from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 import chromadb
+from answer_cache import KB_VERSION_FILENAME, read_kb_version
+from embedding_pipeline import BatchEmbeddingPipeline
+from metrics import Registry
+from chunking import CHUNKING, split_documents
+import embedding_backends
 
 # ENV LOADING
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_API_KEY"] = os.getenv("LANGCHAIN_API_KEY")
+# LangSmith tracing only when a key is configured (offline runs and benchmarks work without one)
+if os.getenv("LANGCHAIN_API_KEY"):
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
 os.environ["LANGCHAIN_PROJECT"] = "AI Solutions"
 
-# Paths
-JSON_PATH = "data_ai/ai_solution_dataset.json"
-CHROMA_PATH = "data1/ai"
+# Paths (relative to this file so the Django app can index into the same store)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JSON_PATH = os.path.join(BASE_DIR, "data_ai/ai_solution_dataset.json")
+CHROMA_PATH = os.getenv("CHROMA_PATH", os.path.join(BASE_DIR, "data1/ai"))
+EMBEDDING_CACHE_PATH = os.path.join(BASE_DIR, "data1/embedding_cache")
+# Prometheus textfile-collector snapshot of the last ingestion run, kept with the store it describes
+INGEST_METRICS_PATH = os.getenv("INGEST_METRICS_PATH", os.path.join(CHROMA_PATH, "ingest_metrics.prom"))
+EMBEDDING_MODEL = embedding_backends.embedding_model_id()
+COLLECTION_NAME = embedding_backends.collection_name()
+# Memory-mapped copy of the collection for VECTOR_BACKEND=snapshot (see vector_snapshot.py)
+VECTOR_SNAPSHOT_EXPORT = os.getenv("VECTOR_SNAPSHOT_EXPORT", "true").lower() == "true"
 
 # ------------------------
 # Load JSON Knowledge Base with Structured Processing
@@ -35,6 +51,7 @@ def load_json_kb(json_path):
     # Handle company as one structured doc
     company = data.get("company", {})
     about = company.get("about", {})
+    contact = company.get("contact", {})
     company_content = (
         f"Company: {company.get('name', '')}\n"
         f"Story: {about.get('story', '')}\n"
@@ -46,9 +63,13 @@ def load_json_kb(json_path):
         f"Vision: {company.get('vision', '')}\n"
         f"Values: {', '.join(company.get('values', []))}\n"
         f"Trusted By: {', '.join(company.get('trusted_by', []))}\n"
+        f"Phone: {contact.get('phone', '')}\n"
+        f"Email: {contact.get('email', '')}\n"
+        f"Location: {contact.get('location', '')}\n"
+        f"Contact Person: {contact.get('person', '')}\n"
         f"CTA: {company.get('cta', '')}"
     )
-    if len(company_content) > 100:
+    if company:
         kb_docs.append(Document(
             page_content=company_content, 
             metadata={"source": "json_kb", "section": "company", "category": "overview"}
@@ -65,11 +86,10 @@ def load_json_kb(json_path):
             f"Benefits: {', '.join(sol.get('benefits', []))}\n"
             f"Use Cases: {', '.join(sol.get('use_cases', []))}"
         )
-        if len(sol_content) > 100:
-            kb_docs.append(Document(
-                page_content=sol_content, 
-                metadata={"source": "json_kb", "section": "solutions", "category": sol.get('category', '')}
-            ))
+        kb_docs.append(Document(
+            page_content=sol_content, 
+            metadata={"source": "json_kb", "section": "solutions", "category": sol.get('category', '')}
+        ))
 
     # Handle events as per-item docs
     events = data.get("events", [])
@@ -83,11 +103,10 @@ def load_json_kb(json_path):
             f"Our Participation: {', '.join(event.get('our_participation', []))}\n"
             f"Key Takeaways: {', '.join(event.get('key_takeaways', []))}"
         )
-        if len(event_content) > 100:
-            kb_docs.append(Document(
-                page_content=event_content, 
-                metadata={"source": "json_kb", "section": "events", "category": event.get('type', '')}
-            ))
+        kb_docs.append(Document(
+            page_content=event_content, 
+            metadata={"source": "json_kb", "section": "events", "category": event.get('type', '')}
+        ))
 
     # Handle projects as per-item docs
     projects = data.get("projects", [])
@@ -97,11 +116,10 @@ def load_json_kb(json_path):
             f"Date: {proj.get('date', '')}\n"
             f"Overview: {proj.get('overview', '')}"
         )
-        if len(proj_content) > 100:
-            kb_docs.append(Document(
-                page_content=proj_content, 
-                metadata={"source": "json_kb", "section": "projects", "category": "project"}
-            ))
+        kb_docs.append(Document(
+            page_content=proj_content, 
+            metadata={"source": "json_kb", "section": "projects", "category": "project"}
+        ))
 
     # Handle articles as per-item docs
     articles = data.get("articles", [])
@@ -111,15 +129,14 @@ def load_json_kb(json_path):
             f"Date: {art.get('date', '')}\n"
             f"Summary: {art.get('summary', '')}"
         )
-        if len(art_content) > 100:
-            kb_docs.append(Document(
-                page_content=art_content, 
-                metadata={"source": "json_kb", "section": "articles", "category": "article"}
-            ))
+        kb_docs.append(Document(
+            page_content=art_content, 
+            metadata={"source": "json_kb", "section": "articles", "category": "article"}
+        ))
 
     # Handle feedback as a single doc
     feedback = data.get("feedback", "")
-    if len(feedback) > 100:
+    if feedback:
         kb_docs.append(Document(
             page_content=f"Feedback Section: {feedback}", 
             metadata={"source": "json_kb", "section": "feedback", "category": "user_feedback"}
@@ -133,60 +150,212 @@ def load_json_kb(json_path):
 # ------------------------
 # Chunk Documents
 # ------------------------
-def chunk_documents(documents):
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=50,
-        length_function=len,
-        separators=["\n\n", "\n", " ", ""]
-    )
-    all_chunks = []
-    for doc in documents:
-        chunks = splitter.split_documents([doc])
-        all_chunks.extend([chunk for chunk in chunks if len(chunk.page_content) > 100])
-    print(f"✅ Created {len(all_chunks)} chunks from {len(documents)} docs (after filtering shorts)")
+def chunk_documents(documents, strategy=CHUNKING):
+    # structured (default) follows the "Field: value" layout; CHUNKING=legacy restores the 500/50 splitter
+    all_chunks = split_documents(documents, strategy)
+    print(f"✅ Created {len(all_chunks)} chunks from {len(documents)} docs ({strategy} chunking)")
     return all_chunks
 
 # ------------------------
-# Setup Chroma Vector Store
+# Embeddings (cached on disk by content hash)
 # ------------------------
-def setup_vector_store(documents):
-    embedding_function = GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001")
+def get_embedding_function():
+    embedding_function = embedding_backends.get_embedding_function()
+    if not embedding_backends.is_remote_backend():
+        return embedding_function  # local backends are cheaper to recompute than to cache
+
+    # Unchanged chunk text never hits the embedding API twice
+    return CacheBackedEmbeddings.from_bytes_store(
+        embedding_function,
+        LocalFileStore(EMBEDDING_CACHE_PATH),
+        namespace=EMBEDDING_MODEL,
+        key_encoder="sha256",
+    )
 
+# ------------------------
+# Deterministic Chunk IDs
+# ------------------------
+def chunk_id(chunk):
+    # Same text + metadata -> same id, so re-runs can diff against the collection
+    payload = json.dumps(
+        {"content": chunk.page_content, "metadata": chunk.metadata},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def assign_chunk_ids(chunks):
+    ids, unique_chunks, seen = [], [], set()
+    for chunk in chunks:
+        cid = chunk_id(chunk)
+        if cid in seen:
+            continue
+        seen.add(cid)
+        ids.append(cid)
+        unique_chunks.append(chunk)
+    return ids, unique_chunks
+
+# ------------------------
+# Setup Chroma Vector Store (incremental)
+# ------------------------
+def open_vector_store():
     client_settings = chromadb.Settings(
         persist_directory=CHROMA_PATH,
         is_persistent=True
     )
+    return Chroma(
+        collection_name=COLLECTION_NAME,
+        # Batched, rate-limited and retried; each finished batch lands in the embedding cache
+        embedding_function=BatchEmbeddingPipeline(get_embedding_function()),
+        client_settings=client_settings,
+        persist_directory=CHROMA_PATH,
+    )
+
+def sync_chunks(vector_store, chunks, where=None):
+    """
+    Upsert only new/changed chunks and delete ones that disappeared.
+
+    `where` limits the comparison to part of the collection (e.g. one source),
+    so other sources sharing the collection are left alone.
+    """
+    ids, chunks = assign_chunk_ids(chunks)
+    existing = set(vector_store.get(where=where, include=[])["ids"])
+
+    stale_ids = sorted(existing - set(ids))
+    new = [(cid, chunk) for cid, chunk in zip(ids, chunks) if cid not in existing]
+
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+    if new:
+        vector_store.add_documents(
+            documents=[chunk for _, chunk in new],
+            ids=[cid for cid, _ in new],
+        )
+
+    return {"added": len(new), "deleted": len(stale_ids), "unchanged": len(ids) - len(new)}
+
+def setup_vector_store(documents, report=None):
+    # `report` (a dict) collects stage timings and counts for write_ingest_metrics
+    report = {} if report is None else report
 
     # Chunk first
+    started = time.perf_counter()
     chunked_docs = chunk_documents(documents)
+    report.setdefault("seconds", {})["chunk"] = time.perf_counter() - started
 
-    vector_store = Chroma.from_documents(
-        collection_name="ai_knowledge",
-        documents=chunked_docs,
-        embedding=embedding_function,
-        client_settings=client_settings
-    )
+    started = time.perf_counter()
+    vector_store = open_vector_store()
+    try:
+        result = sync_chunks(vector_store, chunked_docs, where={"source": "json_kb"})
+    finally:
+        report["seconds"]["sync"] = time.perf_counter() - started
+        report["embedding"] = vector_store.embeddings.last_run
+    report["chunks"] = result
 
-    print(f"✅ Vector store created with {len(chunked_docs)} total chunks")
+    print(
+        f"✅ Vector store synced: {result['added']} added, {result['deleted']} deleted, "
+        f"{result['unchanged']} unchanged"
+    )
+    if result["added"] or result["deleted"]:
+        write_kb_version(vector_store)
+    elif VECTOR_SNAPSHOT_EXPORT and not snapshot_exists():
+        export_vector_snapshot(vector_store)
     return vector_store
 
+# ------------------------
+# Knowledge Base Version
+# ------------------------
+def write_kb_version(vector_store=None):
+    # A new version tells running chatbot workers to drop their cached answers
+    version = uuid.uuid4().hex
+    # Export first, so workers that rebuild on the new version (BM25) already see the new snapshot
+    if vector_store is not None and VECTOR_SNAPSHOT_EXPORT:
+        export_vector_snapshot(vector_store, kb_version=version)
+    os.makedirs(CHROMA_PATH, exist_ok=True)
+    with open(os.path.join(CHROMA_PATH, KB_VERSION_FILENAME), "w", encoding="utf-8") as f:
+        f.write(version)
+
+# ------------------------
+# Vector Snapshot Export
+# ------------------------
+def snapshot_exists():
+    from vector_snapshot import snapshot_directory, read_current_version
+    return read_current_version(snapshot_directory(CHROMA_PATH, COLLECTION_NAME)) is not None
+
+def export_vector_snapshot(vector_store, ivf_lists=None, kb_version=None):
+    from vector_snapshot import IVF_LISTS, export_snapshot, snapshot_directory
+
+    directory = snapshot_directory(CHROMA_PATH, COLLECTION_NAME)
+    try:
+        manifest = export_snapshot(
+            vector_store, directory, kb_version=kb_version or read_kb_version(CHROMA_PATH), model=EMBEDDING_MODEL,
+            ivf_lists=IVF_LISTS if ivf_lists is None else ivf_lists,
+        )
+    except Exception as e:
+        # Chroma stays the source of truth; serving falls back to the previous snapshot
+        print(f"⚠️ Vector snapshot export failed: {e}")
+        return None
+    print(
+        f"✅ Vector snapshot {manifest['version']} exported: {manifest['count']} vectors x "
+        f"{manifest['dimensions']} dims, {manifest['ivf_lists']} IVF lists, {manifest['seconds']}s"
+    )
+    return manifest
+
+# ------------------------
+# Ingestion Metrics
+# ------------------------
+def write_ingest_metrics(report, success, path=INGEST_METRICS_PATH):
+    """Print a one-line summary and write it in Prometheus text format for the node_exporter textfile collector."""
+    registry = Registry()
+    stage_seconds = registry.gauge("chatbot_ingest_stage_seconds", "Time per stage of the last ingestion run.",
+                                   ("stage",))
+    chunks = registry.gauge("chatbot_ingest_chunks", "Chunks added, deleted or unchanged by the last run.",
+                            ("result",))
+    embedding = registry.gauge("chatbot_ingest_embedding", "Embedding pipeline counts for the last run.",
+                               ("stat",))
+    succeeded = registry.gauge("chatbot_ingest_success", "1 if the last ingestion run completed.")
+    finished = registry.gauge("chatbot_ingest_last_run_timestamp_seconds", "When the last ingestion run ended.")
+
+    for stage, seconds in report.get("seconds", {}).items():
+        stage_seconds.set(round(seconds, 4), stage=stage)
+    for result, count in report.get("chunks", {}).items():
+        chunks.set(count, result=result)
+    for name in ("embedded", "batches", "failed_batches", "retries", "chunks_per_second"):
+        if name in report.get("embedding", {}):
+            embedding.set(round(report["embedding"][name], 2), stat=name)
+    succeeded.set(1 if success else 0)
+    finished.set(int(time.time()))
+
+    timings = " ".join(f"{stage}={seconds:.2f}s" for stage, seconds in report.get("seconds", {}).items())
+    counts = " ".join(f"{result}={count}" for result, count in report.get("chunks", {}).items())
+    print(f"📊 Ingestion {'succeeded' if success else 'failed'}: {timings} {counts}".rstrip())
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        registry.write(path)
+        print(f"📊 Metrics written to {path}")
+    except OSError as e:
+        print(f"⚠️ Could not write ingestion metrics: {e}")
+
 # ------------------------
 # Main
 # ------------------------
 def main():
     all_docs = []
+    report = {"seconds": {}}
 
     # Load JSON
+    started = time.perf_counter()
     try:
         print("📥 Loading JSON Knowledge Base...")
         kb_docs = load_json_kb(JSON_PATH)
         all_docs.extend(kb_docs)
     except Exception as e:
         print(f"❌ Error loading JSON: {e}")
+    report["seconds"]["load"] = time.perf_counter() - started
 
     if not all_docs:
         print("❌ No documents found. Exiting.")
+        write_ingest_metrics(report, success=False)
         return
 
     # Dedup across sources (simple content hash)
@@ -203,10 +372,13 @@ def main():
     # Setup vector store
     try:
         print("⚙️ Setting up the vector store...")
-        setup_vector_store(all_docs)
+        setup_vector_store(all_docs, report)
         print(f"✅ Vector store setup completed successfully in {CHROMA_PATH}.")
+        success = True
     except Exception as e:
         print(f"❌ Error setting up vector store: {e}")
+        success = False
+    write_ingest_metrics(report, success)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,197 @@
+# router.py
+import os
+import re
+import csv
+import math
+import threading
+from collections import Counter
+
+# ------------------------
+# Configuration
+# ------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROUTER_EXAMPLES_PATH = os.path.join(BASE_DIR, "data_ai", "router_examples.csv")
+QA_DATASET_PATH = os.path.join(BASE_DIR, "data_ai", "ai_qa_dataset.csv")
+
+# Below this probability the local model defers to the LLM classifier
+ROUTER_CONFIDENCE = float(os.getenv("ROUTER_CONFIDENCE", "0.8"))
+# ...and so it does when fewer than this share of the query's words were seen in training,
+# since the score of a mostly unknown query is little more than the bias
+ROUTER_MIN_KNOWN_WORDS = float(os.getenv("ROUTER_MIN_KNOWN_WORDS", "0.5"))
+
+CASUAL = "CASUAL"
+KNOWLEDGE = "KNOWLEDGE"
+
+# ------------------------
+# Keyword / Regex Rules
+# ------------------------
+# Whole-message small talk: greetings, thanks, goodbyes, acknowledgements
+CASUAL_RULE = re.compile(
+    r"^\s*(?:(?:hi|hello|hey|hiya|yo|howdy|sup|greetings)(?: there)?"
+    r"|good (?:morning|afternoon|evening|night|day)"
+    r"|how are (?:you|u)(?: doing)?(?: today)?|how's it going|what'?s up"
+    r"|thanks?(?: you)?(?: so much| a lot| very much)?|thx|ty|cheers|appreciate it"
+    r"|bye|goodbye|bye bye|see (?:you|ya)(?: later| soon)?|take care|have a (?:nice|good|great) day"
+    r"|ok(?:ay)?|cool|nice|great|awesome|got it|sounds good|sure|alright|lol|haha"
+    r"|who are you|what(?: i|')s your name|are you (?:a )?(?:bot|human|robot)"
+    r")\s*[!.?,:)\s]*$",
+    re.IGNORECASE,
+)
+
+# Domain vocabulary that always needs the knowledge base
+KNOWLEDGE_RULE = re.compile(
+    r"\b(?:solutions?|services?|pric(?:e|es|ing)|costs?|quotes?|demo|contact|email|phone|address|office"
+    r"|events?|webinars?|workshops?|summit|conferences?|projects?|articles?|reports?|case stud(?:y|ies)"
+    r"|healthcare|finance|fintech|education|clients?|founded|mission|vision|team"
+    r"|ai|artificial intelligence|machine learning|deep learning|neural|nlp|llm|chatbot|models?|data)\b",
+    re.IGNORECASE,
+)
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    words = TOKEN_RE.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+# ------------------------
+# TF-IDF + Logistic Regression
+# ------------------------
+class TfidfLogisticClassifier:
+    """Tiny in-process TF-IDF + logistic regression model (KNOWLEDGE = positive class)."""
+
+    def __init__(self, epochs=60, learning_rate=0.5, l2=1e-4):
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.idf = {}
+        self.weights = {}
+        self.bias = 0.0
+
+    def _vectorize(self, text):
+        counts = Counter(t for t in tokenize(text) if t in self.idf)
+        vector = {t: (1 + math.log(c)) * self.idf[t] for t, c in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {t: v / norm for t, v in vector.items()}
+
+    def fit(self, texts, labels):
+        doc_freq = Counter()
+        for text in texts:
+            doc_freq.update(set(tokenize(text)))
+        n_docs = len(texts)
+        self.idf = {t: math.log((1 + n_docs) / (1 + df)) + 1 for t, df in doc_freq.items()}
+
+        vectors = [self._vectorize(text) for text in texts]
+        targets = [1.0 if label == KNOWLEDGE else 0.0 for label in labels]
+
+        # Balance the classes so the larger QA set doesn't swamp the casual examples
+        n_pos = sum(targets) or 1.0
+        n_neg = (len(targets) - sum(targets)) or 1.0
+        sample_weights = [len(targets) / (2 * n_pos) if y else len(targets) / (2 * n_neg) for y in targets]
+
+        for _ in range(self.epochs):
+            for x, y, w in zip(vectors, targets, sample_weights):
+                error = (self._sigmoid(self._score(x)) - y) * w
+                for t, v in x.items():
+                    self.weights[t] = self.weights.get(t, 0.0) * (1 - self.learning_rate * self.l2) - self.learning_rate * error * v
+                self.bias -= self.learning_rate * error
+        return self
+
+    def _score(self, vector):
+        return self.bias + sum(self.weights.get(t, 0.0) * v for t, v in vector.items())
+
+    @staticmethod
+    def _sigmoid(z):
+        if z < -30:
+            return 0.0
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def known_fraction(self, text):
+        """Share of the words in `text` that appeared in the training examples."""
+        words = TOKEN_RE.findall(text.lower())
+        if not words:
+            return 0.0
+        return sum(1 for w in words if w in self.idf) / len(words)
+
+    def predict_proba(self, text):
+        """Probability that `text` is a KNOWLEDGE question."""
+        return self._sigmoid(self._score(self._vectorize(text)))
+
+
+def load_training_examples(examples_path=ROUTER_EXAMPLES_PATH, qa_path=QA_DATASET_PATH):
+    texts, labels = [], []
+    with open(examples_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            texts.append(row["text"])
+            labels.append(row["label"].strip().upper())
+
+    # Every question in the QA dataset is, by definition, a knowledge question
+    if os.path.exists(qa_path):
+        with open(qa_path, newline="", encoding="utf-8") as f:
+            questions = {row["question"].strip() for row in csv.DictReader(f) if row.get("question")}
+        texts.extend(sorted(questions))
+        labels.extend([KNOWLEDGE] * len(questions))
+    return texts, labels
+
+
+# ------------------------
+# Router
+# ------------------------
+class QueryRouter:
+    """
+    Labels queries CASUAL or KNOWLEDGE locally when it can.
+
+    `route` returns the label, or None when neither the rules nor the model are
+    confident enough and the caller should fall back to the LLM classifier.
+    The model is only asked about queries whose words it mostly knows.
+    """
+
+    def __init__(self, model=None, confidence=ROUTER_CONFIDENCE, min_known_words=ROUTER_MIN_KNOWN_WORDS):
+        self.model = model
+        self.confidence = confidence
+        self.min_known_words = min_known_words
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_examples(cls, examples_path=ROUTER_EXAMPLES_PATH, qa_path=QA_DATASET_PATH, **kwargs):
+        texts, labels = load_training_examples(examples_path, qa_path)
+        return cls(model=TfidfLogisticClassifier().fit(texts, labels), **kwargs)
+
+    def _count(self, source):
+        with self._lock:
+            self._counts[source] += 1
+
+    def route(self, query):
+        if CASUAL_RULE.match(query):
+            self._count("rule")
+            return CASUAL
+        if KNOWLEDGE_RULE.search(query):
+            self._count("rule")
+            return KNOWLEDGE
+
+        if self.model is not None and self.model.known_fraction(query) >= self.min_known_words:
+            p_knowledge = self.model.predict_proba(query)
+            if p_knowledge >= self.confidence:
+                self._count("model")
+                return KNOWLEDGE
+            if 1 - p_knowledge >= self.confidence:
+                self._count("model")
+                return CASUAL
+
+        self._count("llm")
+        return None
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        rule, model, llm = counts.get("rule", 0), counts.get("model", 0), counts.get("llm", 0)
+        total = rule + model + llm
+        return {
+            "total": total,
+            "rule_hits": rule,
+            "model_hits": model,
+            "llm_fallbacks": llm,
+            "hit_rate": round((rule + model) / total, 4) if total else 0.0,
+        }
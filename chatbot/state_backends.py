@@ -0,0 +1,86 @@
+# state_backends.py
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# ------------------------
+# Configuration
+# ------------------------
+# memory: per-process dicts (one worker) | sqlite: one WAL-mode file shared by all workers on the host
+STATE_BACKEND = os.getenv("CHAT_STATE_BACKEND", "memory").lower()
+STATE_DB_PATH = os.getenv(
+    "CHAT_STATE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data1", "chat_state.sqlite3"),
+)
+SQLITE_BUSY_TIMEOUT = float(os.getenv("CHAT_STATE_BUSY_TIMEOUT", "5"))
+
+STATE_BACKENDS = ("memory", "sqlite")
+
+
+def check_backend(backend):
+    if backend not in STATE_BACKENDS:
+        raise ValueError(f"Unknown CHAT_STATE_BACKEND '{backend}' (expected memory or sqlite)")
+    return backend
+
+
+# ------------------------
+# SQLite Database
+# ------------------------
+class SQLiteDatabase:
+    """
+    Thread-local connections to one SQLite file.
+
+    WAL mode lets readers in every worker run alongside a single writer;
+    writes go through `transaction()`, which takes the write lock up front
+    (BEGIN IMMEDIATE) so concurrent workers queue instead of deadlocking.
+    Connections are reopened after a fork, never shared across processes.
+    """
+
+    def __init__(self, path=STATE_DB_PATH, timeout=SQLITE_BUSY_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def ensure_schema(self, schema):
+        # CREATE ... IF NOT EXISTS, so every worker can run it on startup
+        self.connection().executescript(schema)
+
+    def execute(self, sql, params=()):
+        return self.connection().execute(sql, params)
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path=STATE_DB_PATH):
+    """One SQLiteDatabase per file per process, shared by the conversation store and answer cache."""
+    with _databases_lock:
+        database = _databases.get(path)
+        if database is None:
+            database = _databases[path] = SQLiteDatabase(path)
+        return database
@@ -0,0 +1,78 @@
+# test_embedding_pipeline.py
+import time
+import threading
+import unittest
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from embedding_pipeline import BatchEmbeddingPipeline
+
+
+class FlakyEmbedder(Embeddings):
+    """Fake embedder whose batches starting with a text in `fail_on` fail their first `failures` attempts."""
+
+    def __init__(self, fail_on=(), failures=1, size=8):
+        self.fake = DeterministicFakeEmbedding(size=size)
+        self.fail_on = set(fail_on)
+        self.failures = failures
+        self.attempts = {}
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self.lock:
+            self.batches.append(len(texts))
+            attempts = self.attempts[texts[0]] = self.attempts.get(texts[0], 0) + 1
+        if texts[0] in self.fail_on and attempts <= self.failures:
+            raise RuntimeError("rate limited")
+        return self.fake.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.fake.embed_query(text)
+
+
+def pipeline(embedder, **kwargs):
+    options = dict(batch_size=4, max_workers=3, requests_per_minute=0, max_retries=2, backoff_seconds=0, report=None)
+    options.update(kwargs)
+    return BatchEmbeddingPipeline(embedder, **options)
+
+
+class BatchEmbeddingPipelineTests(unittest.TestCase):
+    texts = [f"chunk {i}" for i in range(10)]
+
+    def test_batches_keep_input_order(self):
+        embedder = FlakyEmbedder(size=8)
+        vectors = pipeline(embedder).embed_documents(self.texts)
+
+        self.assertEqual(vectors, DeterministicFakeEmbedding(size=8).embed_documents(self.texts))
+        self.assertEqual(sorted(embedder.batches), [2, 4, 4])
+
+    def test_failed_batch_is_retried(self):
+        embedder = FlakyEmbedder(fail_on={"chunk 4"}, failures=2, size=8)
+        embeddings = pipeline(embedder)
+        vectors = embeddings.embed_documents(self.texts)
+
+        self.assertEqual(len(vectors), len(self.texts))
+        self.assertEqual(embeddings.last_run["retries"], 2)
+        self.assertEqual(embeddings.last_run["failed_batches"], 0)
+
+    def test_gives_up_after_max_retries(self):
+        embedder = FlakyEmbedder(fail_on={"chunk 4"}, failures=10, size=8)
+        embeddings = pipeline(embedder)
+
+        with self.assertRaises(RuntimeError):
+            embeddings.embed_documents(self.texts)
+        self.assertEqual(embeddings.last_run["failed_batches"], 1)
+        self.assertEqual(embeddings.last_run["embedded"], 6)  # the other batches still finished
+
+    def test_requests_are_rate_limited(self):
+        # 600/min allows a burst of 10, then one request per 0.1s
+        embeddings = pipeline(FlakyEmbedder(size=8), batch_size=1, requests_per_minute=600)
+        started = time.monotonic()
+        embeddings.embed_documents([f"chunk {i}" for i in range(13)])
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# test_query_rewriter.py
+import unittest
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from query_rewriter import QueryRewriter
+
+HISTORY = [
+    HumanMessage(content="What do you offer for hospitals?"),
+    AIMessage(content="Our AI-Powered Healthcare Diagnostics platform reads scans and flags risks."),
+]
+
+
+class QueryRewriterTests(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def rewrite(inputs):
+            self.calls.append(inputs["input"])
+            return f"rewritten: {inputs['input']}"
+
+        self.rewriter = QueryRewriter()
+        self.contextualize = self.rewriter.runnable(RunnableLambda(rewrite))
+
+    def test_standalone_questions_are_not_rewritten(self):
+        for query in [
+            "What solutions do you offer for retail?",
+            "Tell me more about your finance platform",
+            "Is there another event next month?",
+            "What other industries do you serve?",
+            "Why should I choose AI-Solution over the same tools in-house?",
+            "How is this platform priced compared to the one above?",
+            "Can I book a demo of the fraud detection system?",
+        ]:
+            with self.subTest(query):
+                self.assertEqual(self.contextualize.invoke({"input": query, "chat_history": HISTORY}), query)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.rewriter.stats()["skipped"], 7)
+
+    def test_follow_ups_are_rewritten(self):
+        for query in ["How much does it cost?", "Tell me about that", "What about finance?", "Who uses them?", "pricing?"]:
+            with self.subTest(query):
+                self.assertTrue(QueryRewriter.needs_rewrite(query, HISTORY))
+        self.assertEqual(
+            self.contextualize.invoke({"input": "How accurate is it?", "chat_history": HISTORY}),
+            "rewritten: How accurate is it?",
+        )
+
+    def test_first_turn_is_never_rewritten(self):
+        self.assertFalse(QueryRewriter.needs_rewrite("How much does it cost?", []))
+
+    def test_rewrites_are_cached_per_history(self):
+        inputs = {"input": "How accurate is it?", "chat_history": HISTORY}
+        self.contextualize.invoke(inputs)
+        self.contextualize.invoke(inputs)
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
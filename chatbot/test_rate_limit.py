@@ -0,0 +1,33 @@
+# test_rate_limit.py
+import unittest
+
+from rate_limit import TokenBucketLimiter, acquire_all, forwarded_client, parse_networks
+
+
+class AcquireAllTests(unittest.TestCase):
+    def test_refused_claim_leaves_other_buckets_untouched(self):
+        ip, session = TokenBucketLimiter(60, 5), TokenBucketLimiter(60, 1)
+        self.assertEqual(acquire_all([(ip, "1.2.3.4"), (session, "s1")]), (None, 0.0))
+
+        refused, retry_after = acquire_all([(ip, "1.2.3.4"), (session, "s1")])
+        self.assertEqual(refused, 1)
+        self.assertGreater(retry_after, 0)
+        # Only the first, allowed request took an IP token
+        self.assertAlmostEqual(ip._buckets["1.2.3.4"][0], 4, places=2)
+
+    def test_disabled_limiter_never_refuses(self):
+        self.assertEqual(acquire_all([(TokenBucketLimiter(0, 1), "k")] * 3), (None, 0.0))
+
+
+class ForwardedClientTests(unittest.TestCase):
+    trusted = parse_networks(["10.0.0.0/8"])
+
+    def test_untrusted_peer_ignores_header(self):
+        self.assertEqual(forwarded_client("8.8.8.8", "1.1.1.1", self.trusted), "8.8.8.8")
+
+    def test_trusted_peer_uses_rightmost_untrusted_hop(self):
+        self.assertEqual(forwarded_client("10.0.0.2", "6.6.6.6, 1.1.1.1, 10.0.0.1", self.trusted), "1.1.1.1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+# test_router.py
+import csv
+import os
+import unittest
+
+from router import BASE_DIR, CASUAL, KNOWLEDGE, QueryRouter
+
+HOLDOUT_PATH = os.path.join(BASE_DIR, "data_ai", "router_holdout.csv")
+
+
+class QueryRouterTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.router = QueryRouter.from_examples()
+        with open(HOLDOUT_PATH, newline="", encoding="utf-8") as f:
+            cls.holdout = [(row["text"], row["label"]) for row in csv.DictReader(f)]
+
+    def test_holdout_accuracy(self):
+        # Queries kept out of training: local decisions must be right, and most must be local
+        routed = [(text, label, self.router.route(text)) for text, label in self.holdout]
+        decided = [(text, label, got) for text, label, got in routed if got is not None]
+        wrong = [(text, label) for text, label, got in decided if got != label]
+
+        self.assertLessEqual(len(wrong), len(decided) * 0.05, wrong)
+        self.assertGreaterEqual(len(decided), len(self.holdout) * 0.7)
+
+    def test_known_misroutes_never_go_the_wrong_way(self):
+        for text, wrong_label in [
+            ("where are you located", CASUAL),
+            ("what time is it", KNOWLEDGE),
+            ("Can you help me?", KNOWLEDGE),
+            ("what are your opening hours", CASUAL),
+            ("how can I reach you", CASUAL),
+        ]:
+            with self.subTest(text):
+                self.assertNotEqual(self.router.route(text), wrong_label)
+
+    def test_mostly_unknown_words_defer_to_llm(self):
+        self.assertIsNone(self.router.route("zxqv blorp frobnicate"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,317 @@
+# vector_snapshot.py
+"""
+Read-only, memory-mapped copy of a Chroma collection for serving.
+
+retriever.py exports the collection's embeddings as one contiguous float32
+matrix (embeddings.npy, rows L2-normalised) plus metadata.json with the ids,
+texts and metadata, into a new version directory, then points CURRENT at it.
+Workers open the matrix with np.load(mmap_mode="r"), so every worker on the
+host shares one copy in the page cache instead of holding its own chromadb
+client, and search is a single matrix-vector product.
+
+With VECTOR_IVF_LISTS > 0 the export also clusters the rows (spherical
+k-means) and stores them grouped by cluster, so a query only scores the
+VECTOR_IVF_NPROBE closest clusters.
+
+    python vector_snapshot.py export --ivf-lists 64
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+# ------------------------
+# Configuration
+# ------------------------
+IVF_LISTS = int(os.getenv("VECTOR_IVF_LISTS", "0"))  # 0: brute force only
+IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+SNAPSHOT_KEEP = int(os.getenv("VECTOR_SNAPSHOT_KEEP", "2"))  # versions kept on disk, current included
+
+FORMAT_VERSION = 1
+CURRENT_FILENAME = "CURRENT"
+EMBEDDINGS_FILENAME = "embeddings.npy"
+METADATA_FILENAME = "metadata.json"
+CENTROIDS_FILENAME = "ivf_centroids.npy"
+OFFSETS_FILENAME = "ivf_offsets.npy"
+
+
+def snapshot_directory(chroma_path, collection_name):
+    # One snapshot tree per collection: each embedding backend has its own
+    return os.getenv("VECTOR_SNAPSHOT_PATH") or os.path.join(chroma_path, "snapshots", collection_name)
+
+
+def read_current_version(directory):
+    try:
+        with open(os.path.join(directory, CURRENT_FILENAME), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores, k):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+# ------------------------
+# IVF Clustering
+# ------------------------
+def spherical_kmeans(vectors, n_lists, iterations=10, seed=0, block_rows=8192):
+    """Cluster unit vectors by cosine similarity; returns (centroids, assignments)."""
+    rng = np.random.default_rng(seed)
+    n_lists = min(n_lists, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    assignments = np.zeros(len(vectors), dtype=np.int64)
+
+    for _ in range(iterations):
+        for start in range(0, len(vectors), block_rows):
+            block = vectors[start:start + block_rows]
+            assignments[start:start + block_rows] = np.argmax(block @ centroids.T, axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=n_lists)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty lists from random rows rather than leaving dead centroids
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = _normalize(sums).astype(np.float32)
+
+    return centroids, assignments
+
+
+# ------------------------
+# Export
+# ------------------------
+def export_snapshot(vector_store, directory, kb_version=None, model="", ivf_lists=IVF_LISTS, keep=SNAPSHOT_KEEP):
+    """Write the collection behind `vector_store` as a new snapshot version and make it current."""
+    started = time.perf_counter()
+    data = vector_store.get(include=["embeddings", "documents", "metadatas"])
+    ids = list(data["ids"])
+    documents = list(data["documents"])
+    metadatas = [m or {} for m in data["metadatas"]]
+    embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+    if not ids:
+        raise ValueError("Collection is empty; nothing to export")
+    embeddings = _normalize(embeddings.reshape(len(ids), -1)).astype(np.float32)
+
+    centroids, offsets = None, None
+    if ivf_lists and len(ids) > ivf_lists:
+        centroids, assignments = spherical_kmeans(embeddings, ivf_lists)
+        # Rows of one list are stored next to each other, so probing a list is a contiguous slice
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1)).astype(np.int64)
+        embeddings = embeddings[order]
+        ids = [ids[i] for i in order]
+        documents = [documents[i] for i in order]
+        metadatas = [metadatas[i] for i in order]
+
+    version = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(directory, exist_ok=True)
+    staging = os.path.join(directory, f".{version}.tmp")
+    os.makedirs(staging)
+    try:
+        np.save(os.path.join(staging, EMBEDDINGS_FILENAME), np.ascontiguousarray(embeddings))
+        if centroids is not None:
+            np.save(os.path.join(staging, CENTROIDS_FILENAME), centroids)
+            np.save(os.path.join(staging, OFFSETS_FILENAME), offsets)
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "kb_version": kb_version,
+            "model": model,
+            "count": len(ids),
+            "dimensions": int(embeddings.shape[1]),
+            "ivf_lists": 0 if centroids is None else len(centroids),
+            "created_at": time.time(),
+        }
+        with open(os.path.join(staging, METADATA_FILENAME), "w", encoding="utf-8") as f:
+            json.dump({"manifest": manifest, "ids": ids, "documents": documents, "metadatas": metadatas}, f)
+        os.replace(staging, os.path.join(directory, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Switch readers over atomically; they notice on their next search
+    pointer = os.path.join(directory, f".{CURRENT_FILENAME}.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, CURRENT_FILENAME))
+
+    prune_snapshots(directory, keep)
+    manifest["seconds"] = round(time.perf_counter() - started, 3)
+    return manifest
+
+
+def prune_snapshots(directory, keep=SNAPSHOT_KEEP):
+    # Version names sort by time; a worker still mapping a removed version keeps its pages (POSIX unlink)
+    current = read_current_version(directory)
+    versions = sorted(
+        name for name in os.listdir(directory)
+        if not name.startswith(".") and os.path.isdir(os.path.join(directory, name))
+    )
+    stale = [name for name in versions if name != current][:max(0, len(versions) - max(keep, 1))]
+    for name in stale:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+# ------------------------
+# Memory-mapped Index
+# ------------------------
+class SnapshotIndex:
+    """One snapshot version: the mapped matrix, its documents and the optional IVF lists."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, METADATA_FILENAME), encoding="utf-8") as f:
+            data = json.load(f)
+        self.manifest = data["manifest"]
+        self.ids = data["ids"]
+        self.documents = data["documents"]
+        self.metadatas = data["metadatas"]
+        self.embeddings = np.load(os.path.join(path, EMBEDDINGS_FILENAME), mmap_mode="r")
+
+        self.centroids, self.offsets = None, None
+        if self.manifest.get("ivf_lists"):
+            self.centroids = np.load(os.path.join(path, CENTROIDS_FILENAME))
+            self.offsets = np.load(os.path.join(path, OFFSETS_FILENAME))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query_vector, k, nprobe=IVF_NPROBE):
+        """Return (row_indices, cosine_scores), best first."""
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        if self.centroids is None or nprobe >= len(self.centroids):
+            scores = self.embeddings @ query
+            top = _top_k(scores, k)
+            return top, scores[top]
+
+        lists = _top_k(self.centroids @ query, nprobe)
+        rows, scores = [], []
+        for i in lists:
+            start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+            if end > start:
+                rows.append(np.arange(start, end))
+                scores.append(self.embeddings[start:end] @ query)
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        top = _top_k(scores, k)
+        return rows[top], scores[top]
+
+    def document(self, row):
+        return Document(id=self.ids[row], page_content=self.documents[row], metadata=self.metadatas[row])
+
+
+class SnapshotVectorStore(VectorStore):
+    """
+    Read-only vector store over the current snapshot (VECTOR_BACKEND=snapshot).
+
+    Implements the parts of the Chroma store the retrievers use:
+    similarity_search, get() for the BM25 index, and as_retriever().
+    A new export is picked up on the next search.
+    """
+
+    def __init__(self, directory, embedding_function, model=None, nprobe=IVF_NPROBE):
+        self.directory = directory
+        self._embedding = embedding_function
+        self.model = model
+        self.nprobe = nprobe
+        self._index = None
+        self._lock = threading.Lock()
+        self.index()
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def index(self):
+        version = read_current_version(self.directory)
+        if version is None:
+            raise ValueError(f"No vector snapshot in {self.directory}. Run retriever.py or vector_snapshot.py export.")
+        with self._lock:
+            if self._index is None or self._index.manifest["version"] != version:
+                index = SnapshotIndex(os.path.join(self.directory, version))
+                if self.model and index.manifest.get("model") and index.manifest["model"] != self.model:
+                    raise ValueError(
+                        f"Snapshot {version} was embedded with {index.manifest['model']}, not {self.model}"
+                    )
+                self._index = index
+            return self._index
+
+    def __len__(self):
+        return len(self.index())
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4):
+        index = self.index()
+        rows, scores = index.search(embedding, k, self.nprobe)
+        return [(index.document(int(row)), float(score)) for row, score in zip(rows, scores)]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are already cosine similarities
+        return lambda score: score
+
+    def get(self, include=None, **kwargs):
+        index = self.index()
+        return {"ids": list(index.ids), "documents": list(index.documents), "metadatas": list(index.metadatas)}
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("Snapshots are read-only; run retriever.py to update the knowledge base")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Snapshots are exported from Chroma; see export_snapshot()")
+
+
+# ------------------------
+# CLI
+# ------------------------
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("export", "info"))
+    parser.add_argument("--ivf-lists", type=int, default=IVF_LISTS, help="0 for brute force only")
+    args = parser.parse_args()
+
+    import retriever
+
+    directory = snapshot_directory(retriever.CHROMA_PATH, retriever.COLLECTION_NAME)
+    if args.command == "export":
+        retriever.export_vector_snapshot(retriever.open_vector_store(), ivf_lists=args.ivf_lists)
+        return
+
+    version = read_current_version(directory)
+    if version is None:
+        print(f"❌ No snapshot in {directory}")
+        return
+    print(json.dumps(SnapshotIndex(os.path.join(directory, version)).manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,9 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'core'
\ No newline at end of file
+    name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .chatbot import get_intent_index
+        get_intent_index()  # compile the canned-answer index once, not on the first chat message
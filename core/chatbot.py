@@ -0,0 +1,236 @@
+"""
+Website chatbot endpoint helpers.
+
+Canned answers live in core/data/chatbot_intents.json and are compiled once
+into a token trie, so matching a message costs one pass over its words no
+matter how many intents or phrases there are. Phrases only match whole words
+("hi" no longer fires on "this"), and only short messages
+(CHATBOT_INTENT_MAX_WORDS) or messages that are exactly one phrase get a
+canned answer, so a keyword inside a real question doesn't hijack it. The
+longest matching phrase wins; ties go to the intent whose phrases cover more
+of the message, then to the one listed first in the file. Anything without a
+canned answer is forwarded to the FastAPI RAG service (CHATBOT_API_URL).
+
+Forwarded questions are rate limited per client IP and per chat session
+with in-memory token buckets (one set per worker process), using the chat
+service's own chatbot/rate_limit.py; canned answers cost nothing and are
+never limited.
+"""
+import asyncio
+import importlib
+import json
+import logging
+import re
+import sys
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+INTENTS_FILE = Path(__file__).resolve().parent / 'data' / 'chatbot_intents.json'
+
+FALLBACK_RESPONSE = (
+    "I'm sorry, I didn't understand that. Could you please rephrase your question "
+    "or contact our support team?"
+)
+RATE_LIMIT_RESPONSE = "You're sending messages a little too quickly. Please wait a moment and try again."
+
+Intent = namedtuple('Intent', 'name response')
+# What the RAG service said: `status` is 200, or 429/503 with a visitor-facing answer and Retry-After
+RagReply = namedtuple('RagReply', 'answer session_id status retry_after')
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_END = object()  # trie key marking the last token of a phrase
+
+
+def tokenize(text):
+    return _WORD_RE.findall(str(text).lower())
+
+
+class IntentIndex:
+    """Token trie over every intent phrase."""
+
+    def __init__(self, intents, max_words=None):
+        self._root = {}
+        self.max_words = max_words
+        self.phrase_count = 0
+        for priority, item in enumerate(intents):
+            intent = Intent(item['name'], item['response'])
+            for phrase in item['phrases']:
+                tokens = tokenize(phrase)
+                if not tokens:
+                    continue
+                node = self._root
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                # A phrase listed under two intents belongs to the first one
+                node.setdefault(_END, (priority, intent))
+                self.phrase_count += 1
+        self.intent_count = len(intents)
+
+    @classmethod
+    def from_file(cls, path=INTENTS_FILE, max_words=None):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), max_words=max_words)
+
+    def _exact(self, tokens):
+        node = self._root
+        for token in tokens:
+            node = node.get(token)
+            if node is None:
+                return None
+        return node.get(_END, (None, None))[1]
+
+    def match(self, message):
+        """Best intent for the message, or None."""
+        tokens = tokenize(message)
+        if self.max_words is not None and len(tokens) > self.max_words:
+            return self._exact(tokens)
+
+        # intent name -> [longest phrase, covered token positions, -priority, intent]
+        found = {}
+        for start in range(len(tokens)):
+            node = self._root
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if _END in node:
+                    priority, intent = node[_END]
+                    entry = found.setdefault(intent.name, [0, set(), -priority, intent])
+                    entry[0] = max(entry[0], end - start + 1)
+                    entry[1].update(range(start, end + 1))
+        if not found:
+            return None
+        best = max(found.values(), key=lambda entry: (entry[0], len(entry[1]), entry[2]))
+        return best[3]
+
+
+@lru_cache(maxsize=None)
+def get_intent_index():
+    """Built once per process; CoreConfig.ready() primes it at startup."""
+    return IntentIndex.from_file(
+        getattr(settings, 'CHATBOT_INTENTS_FILE', INTENTS_FILE), max_words=settings.CHATBOT_INTENT_MAX_WORDS
+    )
+
+
+def import_chatbot_module(name):
+    """
+    Import a module from chatbot/ (the FastAPI service), which lives outside the Django project packages.
+
+    The service's modules import each other by bare name, so chatbot/ has to
+    be on sys.path; it goes at the end, so its generic names (app, metrics,
+    router, ...) never shadow a module the project or its packages provide.
+    A chatbot module that is itself shadowed that way is an ImportError
+    rather than a silent mix-up.
+    """
+    chatbot_dir = Path(settings.CHATBOT_DIR).resolve()
+    if str(chatbot_dir) not in sys.path:
+        sys.path.append(str(chatbot_dir))
+    module = importlib.import_module(name)
+    origin = Path(getattr(module, '__file__', None) or '').resolve()
+    if origin.parent != chatbot_dir:
+        raise ImportError(f"{name!r} resolved to {origin}, not to the chatbot service in {chatbot_dir}")
+    return module
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiters():
+    rate_limit = import_chatbot_module('rate_limit')
+    return {
+        'ip': rate_limit.TokenBucketLimiter(
+            settings.CHATBOT_RATE_LIMIT_IP_PER_MINUTE, settings.CHATBOT_RATE_LIMIT_IP_BURST, max_keys=10000
+        ),
+        'session': rate_limit.TokenBucketLimiter(
+            settings.CHATBOT_RATE_LIMIT_SESSION_PER_MINUTE, settings.CHATBOT_RATE_LIMIT_SESSION_BURST, max_keys=10000
+        ),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_trusted_proxies():
+    return import_chatbot_module('rate_limit').parse_networks(settings.CHATBOT_TRUSTED_PROXIES)
+
+
+def client_ip(request):
+    """REMOTE_ADDR, or the right-most untrusted X-Forwarded-For hop when behind a trusted proxy."""
+    return import_chatbot_module('rate_limit').forwarded_client(
+        request.META.get('REMOTE_ADDR', ''), request.headers.get('X-Forwarded-For', ''), get_trusted_proxies(),
+    )
+
+
+def check_rate_limit(ip, session_id):
+    """None when the message may be forwarded, else the seconds until it may retry."""
+    limiters = get_rate_limiters()
+    claims = [(scope, key) for scope, key in (('ip', ip), ('session', session_id)) if key]
+    # Both buckets or neither, so a throttled session doesn't drain its IP's budget
+    refused, retry_after = import_chatbot_module('rate_limit').acquire_all(
+        (limiters[scope], key) for scope, key in claims
+    )
+    if refused is None:
+        return None
+    scope, key = claims[refused]
+    logger.warning("Chatbot rate limit hit for %s=%s (retry in %.1fs)", scope, key, retry_after)
+    return retry_after
+
+
+def _post_json(url, payload, headers, timeout):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json', **headers},
+        method='POST',
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.load(response), response.headers
+    except urllib.error.HTTPError as e:
+        # 429 (rate limited) and 503 (busy) carry a message meant for the visitor
+        if e.code in (429, 503):
+            return e.code, json.load(e), e.headers
+        raise
+
+
+async def ask_rag_service(message, session_id='', ip=''):
+    """
+    Forward a message to the chatbot service's /chat endpoint.
+
+    Returns a RagReply. Its answer is None when the service is not
+    configured, times out or fails, so the caller can fall back; a 429 or
+    503 from the service keeps its status and Retry-After for the caller
+    to pass on.
+    """
+    unavailable = RagReply(None, session_id, 200, None)
+    url = settings.CHATBOT_API_URL
+    if not url:
+        return unavailable
+    timeout = settings.CHATBOT_API_TIMEOUT
+    headers = {'X-Session-ID': session_id} if session_id else {}
+    if ip:
+        # Lets the service rate limit visitors rather than this site (see CHAT_TRUSTED_PROXIES)
+        headers['X-Forwarded-For'] = ip
+    try:
+        # urllib keeps this dependency-free; the thread keeps the event loop free
+        status, payload, response_headers = await asyncio.wait_for(
+            asyncio.to_thread(_post_json, url, {'query': message}, headers, timeout),
+            timeout=timeout,
+        )
+    except (asyncio.TimeoutError, TimeoutError):
+        logger.warning("Chatbot service timed out after %ss", timeout)
+        return unavailable
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        logger.warning("Chatbot service request failed: %s", e)
+        return unavailable
+    answer = payload.get('response')
+    if not answer:
+        return unavailable
+    if status != 200:
+        logger.warning("Chatbot service answered %s", status)
+    return RagReply(
+        answer, response_headers.get('X-Session-ID', '') or session_id, status, response_headers.get('Retry-After'),
+    )
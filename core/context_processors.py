@@ -1,4 +1,7 @@
+from django.conf import settings as django_settings
+from django.utils.functional import SimpleLazyObject
 from .models import SiteSettings, ContactInquiry, Feedback
+from .page_cache import SECTIONS, section_versions
 
 def site_settings(request):
     """Add site settings to all templates"""
@@ -6,6 +9,19 @@ def site_settings(request):
         'settings': SiteSettings.load()
     }
 
+def chatbot(request):
+    """Expose the chatbot streaming endpoint to the chat widget"""
+    return {
+        'chatbot_stream_url': django_settings.CHATBOT_STREAM_URL
+    }
+
+def cache_versions(request):
+    """Content versions and timeout for versioned {% cache %} fragments"""
+    return {
+        'cache_versions': SimpleLazyObject(lambda: section_versions(SECTIONS)),
+        'fragment_cache_timeout': django_settings.PAGE_CACHE_TIMEOUT if django_settings.PAGE_CACHE_ENABLED else 0,
+    }
+
 def admin_notifications(request):
     """Add admin notifications to templates"""
     if request.user.is_authenticated and hasattr(request.user, 'has_admin_access') and request.user.has_admin_access():
@@ -0,0 +1,132 @@
+"""
+Streamed file downloads with ETag and byte-range support.
+
+serve_file() never reads a whole file into memory. In the default 'django'
+mode it streams the file in DOWNLOAD_CHUNK_SIZE pieces, answering
+`Range: bytes=...` requests with 206 Partial Content. In the 'x-sendfile'
+(Apache mod_xsendfile, lighttpd) and 'x-accel-redirect' (nginx) modes it
+only returns headers and the web server sends the file, ranges included.
+Conditional requests (If-None-Match, If-Modified-Since, If-Match) are
+answered by Django in every mode.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(field_file, size, modified):
+    # Changes whenever the file is replaced or rewritten; no need to hash the contents
+    stamp = int(modified.timestamp()) if modified else 0
+    name = hashlib.md5(field_file.name.encode('utf-8')).hexdigest()[:12]
+    return quote_etag(f'{name}-{size:x}-{stamp:x}')
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single `bytes=` range, None to send the
+    whole file (no header, or one we don't handle such as multiple ranges),
+    or 'unsatisfiable'.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _read_range(field_file, start, length, chunk_size):
+    try:
+        field_file.seek(start)
+        while length > 0:
+            data = field_file.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        field_file.close()
+
+
+def serve_file(request, field_file, filename=None, content_type=None, on_download=None):
+    """
+    Response for downloading `field_file` as an attachment.
+
+    `on_download` is called once per real download: a full GET, or a range
+    request starting at byte 0, not for the follow-up range requests
+    of resumed downloads and PDF viewers, nor for HEAD or 304 responses.
+    """
+    storage, name = field_file.storage, field_file.name
+    size = storage.size(name)
+    try:
+        modified = storage.get_modified_time(name)
+    except (NotImplementedError, OSError):
+        modified = None
+    etag = file_etag(field_file, size, modified)
+    last_modified = int(modified.timestamp()) if modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    filename = filename or os.path.basename(name)
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and if_range.strip() != etag:
+        byte_range = None  # The client's partial copy is outdated: send it all again
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if on_download and request.method == 'GET' and (byte_range is None or byte_range[0] == 0):
+        on_download()
+
+    mode = settings.DOWNLOAD_SERVE_MODE
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = field_file.path
+    elif mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.DOWNLOAD_ACCEL_PREFIX + quote(name)
+    elif byte_range is None:
+        response = FileResponse(field_file.open('rb'), content_type=content_type)
+        response.block_size = settings.DOWNLOAD_CHUNK_SIZE
+        response['Accept-Ranges'] = 'bytes'
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(field_file.open('rb'), start, end - start + 1, settings.DOWNLOAD_CHUNK_SIZE),
+            status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -301,6 +301,7 @@ class ArticleForm(forms.ModelForm):
             'content', 
             'excerpt', 
             'featured_image', 
+            'pdf_file',
             'status', 
             'is_featured',
             'published_at',  # optional, if you want to allow setting publish date
@@ -313,6 +314,7 @@ class ArticleForm(forms.ModelForm):
             'content': TinyMCE(attrs={'cols': 80, 'rows': 10}),  # Rich text editor
             'excerpt': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Short summary'}),
             'featured_image': forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': 'image/*'}),
+            'pdf_file': forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': 'application/pdf'}),
             'status': forms.Select(attrs={'class': 'form-select'}),
             'is_featured': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'published_at': forms.DateTimeInput(attrs={'class': 'form-control', 'type': 'datetime-local'}),
@@ -330,6 +332,7 @@ class ArticleForm(forms.ModelForm):
             'content',
             'excerpt',
             'featured_image',
+            'pdf_file',
             'status',
             'is_featured',
             'published_at',
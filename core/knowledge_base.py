@@ -0,0 +1,221 @@
+"""
+Feed live site content into the chatbot's vector store.
+
+Rows are turned into LangChain documents with the same "Field: value" layout
+that chatbot/retriever.py uses for the JSON knowledge base, then synced into
+the shared ai_knowledge collection by deterministic chunk id, so unchanged
+rows cost no embedding calls.
+"""
+from django.utils.html import strip_tags
+
+from .chatbot import import_chatbot_module
+from .models import AboutUs, Article, Event, Project, Solution
+
+
+SOURCE = 'django'
+
+
+def _text(value):
+    return ' '.join(strip_tags(value or '').split())
+
+
+def _join(values):
+    return ', '.join(str(v) for v in values or [] if v)
+
+
+def _solution_content(obj):
+    return (
+        f"Solution: {obj.title}\n"
+        f"Category: {obj.get_category_display()}\n"
+        f"Overview: {_text(obj.description)}\n"
+        f"Details: {_text(obj.detailed_content)}\n"
+        f"Features: {_join(obj.features)}\n"
+        f"Benefits: {_join(obj.benefits)}\n"
+        f"Use Cases: {_join(obj.use_cases)}"
+    )
+
+
+def _event_content(obj):
+    return (
+        f"Event: {obj.title}\n"
+        f"Type: {obj.get_event_type_display()}\n"
+        f"Status: {obj.get_status_display()}\n"
+        f"Date: {obj.date} {obj.time}\n"
+        f"Location: {obj.location}\n"
+        f"Price: {obj.price}\n"
+        f"Description: {_text(obj.description)}"
+    )
+
+
+def _article_content(obj):
+    return (
+        f"Article: {obj.title}\n"
+        f"Type: {obj.get_article_type_display()}\n"
+        f"Author: {obj.author}\n"
+        f"Date: {obj.published_at.date() if obj.published_at else ''}\n"
+        f"Summary: {_text(obj.excerpt)}\n"
+        f"Content: {_text(obj.content)}"
+    )
+
+
+def _project_content(obj):
+    return (
+        f"Project: {obj.title}\n"
+        f"Date: {obj.completed_on}\n"
+        f"Tags: {_join(tag.name for tag in obj.tags.all())}\n"
+        f"Summary: {_text(obj.summary)}\n"
+        f"Overview: {_text(obj.description)}"
+    )
+
+
+def _about_content(obj):
+    return (
+        f"Company: {obj.title}\n"
+        f"Story: {_text(obj.company_background)}\n"
+        f"Founded: {obj.founded_year}\n"
+        f"Team Size: {obj.employees_count}+\n"
+        f"Clients: {obj.clients_count}+\n"
+        f"Countries: {obj.countries_count}+\n"
+        f"Mission: {_text(obj.mission)}\n"
+        f"Vision: {_text(obj.vision)}\n"
+        f"Values: {_text(obj.values)}"
+    )
+
+
+# model -> (section, fields to load, row filter, content builder, category)
+KB_SOURCES = {
+    Solution: (
+        'solutions',
+        ('id', 'title', 'description', 'detailed_content', 'category', 'features', 'benefits', 'use_cases', 'is_active'),
+        {'is_active': True},
+        _solution_content,
+        lambda obj: obj.get_category_display(),
+    ),
+    Event: (
+        'events',
+        ('id', 'title', 'description', 'event_type', 'status', 'date', 'time', 'location', 'price'),
+        {},
+        _event_content,
+        lambda obj: obj.get_event_type_display(),
+    ),
+    Article: (
+        'articles',
+        ('id', 'title', 'excerpt', 'content', 'article_type', 'author', 'published_at', 'status'),
+        {'status': 'published'},
+        _article_content,
+        lambda obj: 'article',
+    ),
+    Project: (
+        'projects',
+        ('id', 'title', 'summary', 'description', 'completed_on'),
+        {},
+        _project_content,
+        lambda obj: 'project',
+    ),
+    AboutUs: (
+        'company',
+        ('id', 'title', 'company_background', 'mission', 'vision', 'values',
+         'founded_year', 'employees_count', 'clients_count', 'countries_count'),
+        {},
+        _about_content,
+        lambda obj: 'overview',
+    ),
+}
+
+
+def get_retriever():
+    """Import chatbot/retriever.py, which lives outside the Django project packages."""
+    return import_chatbot_module('retriever')
+
+
+def source_id(model, pk):
+    return f"{model._meta.label_lower}:{pk}"
+
+
+def build_documents(obj):
+    from langchain.schema import Document
+
+    section, _, _, content, category = KB_SOURCES[type(obj)]
+    return [Document(
+        page_content=content(obj),
+        metadata={
+            'source': SOURCE,
+            'section': section,
+            'category': category(obj),
+            'model': obj._meta.label_lower,
+            'source_id': source_id(type(obj), obj.pk),
+        },
+    )]
+
+
+def indexable_queryset(model):
+    _, fields, filters, _, _ = KB_SOURCES[model]
+    queryset = model.objects.filter(**filters).only(*fields).order_by('pk')
+    if model is Project:
+        queryset = queryset.prefetch_related('tags')
+    return queryset
+
+
+def iter_document_batches(model, chunk_size=200):
+    """Yield the documents of `chunk_size` rows at a time, without loading the whole table."""
+    batch = []
+    for obj in indexable_queryset(model).iterator(chunk_size=chunk_size):
+        batch.extend(build_documents(obj))
+        if len(batch) >= chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def index_model(model, vector_store=None, chunk_size=200):
+    """
+    Sync every indexable row of `model`; rows that disappeared are removed.
+
+    Each batch of rows is chunked and its new chunks are added before the
+    next batch is read, so memory stays bounded by `chunk_size` rows.
+    """
+    retriever = get_retriever()
+    vector_store = vector_store or retriever.open_vector_store()
+    where = {'$and': [{'source': SOURCE}, {'model': model._meta.label_lower}]}
+    existing = set(vector_store.get(where=where, include=[])['ids'])
+
+    seen, added = set(), 0
+    for documents in iter_document_batches(model, chunk_size=chunk_size):
+        ids, chunks = retriever.assign_chunk_ids(retriever.split_documents(documents, retriever.CHUNKING))
+        new = [(cid, chunk) for cid, chunk in zip(ids, chunks) if cid not in existing and cid not in seen]
+        seen.update(ids)
+        if new:
+            vector_store.add_documents(documents=[chunk for _, chunk in new], ids=[cid for cid, _ in new])
+            added += len(new)
+
+    stale_ids = sorted(existing - seen)
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+
+    # The caller publishes the change (publish_kb_version) once it has synced everything
+    return {'added': added, 'deleted': len(stale_ids), 'unchanged': len(seen) - added}
+
+
+def index_instance(model, pk):
+    """Re-index one row, or drop its chunks if it was deleted or is no longer public."""
+    retriever = get_retriever()
+    obj = indexable_queryset(model).filter(pk=pk).first()
+    documents = build_documents(obj) if obj is not None else []
+    vector_store = retriever.open_vector_store()
+    return retriever.sync_chunks(
+        vector_store,
+        retriever.chunk_documents(documents),
+        where={'source_id': source_id(model, pk)},
+    )
+
+
+def publish_kb_version(vector_store=None):
+    """
+    Export a fresh vector snapshot and bump kb_version, so chat workers reload.
+
+    This empties every worker's answer cache and rebuilds BM25, so call it
+    once after a batch of index_model()/index_instance() changes, not per row.
+    """
+    retriever = get_retriever()
+    retriever.write_kb_version(vector_store or retriever.open_vector_store())
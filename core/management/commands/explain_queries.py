@@ -0,0 +1,160 @@
+import datetime
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import ActivityLog, Article, ContactInquiry, Event, Feedback, GalleryItem, Project, Solution
+
+
+class Rollback(Exception):
+    pass
+
+
+def audited_queries():
+    """(name, queryset) for the hot list/detail/count queries of core/views.py and the admin dashboard."""
+    today = timezone.now().date()
+    return [
+        ('home: latest articles', Article.objects.filter(status='published').order_by('-published_at')[:3]),
+        ('home: latest projects', Project.objects.order_by('-completed_on')[:3]),
+        ('solutions', Solution.objects.filter(is_active=True).order_by('order', 'title')),
+        ('solutions by category', Solution.objects.filter(is_active=True, category='finance').order_by('order', 'title')),
+        # get_object_or_404() drops the default ordering
+        ('solution detail', Solution.objects.filter(slug='solution-1', is_active=True).order_by()),
+        ('article detail', Article.objects.filter(slug='article-1').order_by()),
+        ('project detail', Project.objects.filter(slug='project-1').order_by()),
+        ('events', Event.objects.order_by('date', 'time')[:9]),
+        ('events by type', Event.objects.filter(event_type='webinar').order_by('date', 'time')[:9]),
+        ('events by status', Event.objects.filter(status='completed').order_by('date', 'time')[:9]),
+        ('dashboard: upcoming events',
+         Event.objects.filter(status='upcoming', date__gte=today).order_by('date')[:5]),
+        ('gallery', GalleryItem.objects.order_by('-event_date', 'order')[:9]),
+        ('gallery by category', GalleryItem.objects.filter(category='demo').order_by('-event_date', 'order')[:9]),
+        ('feedback list', Feedback.objects.order_by('-created_at')[:5]),
+        ('dashboard: pending feedback', Feedback.objects.filter(is_approved=False)),
+        ('dashboard: unread inquiries', ContactInquiry.objects.filter(is_read=False)),
+        ('dashboard: recent inquiries', ContactInquiry.objects.order_by('-created_at')[:5]),
+        ('dashboard: recent activity', ActivityLog.objects.order_by('-timestamp')[:10]),
+    ]
+
+
+def plan_warnings(plan):
+    """Lines of an EXPLAIN plan that read a whole table or sort it."""
+    warnings = []
+    for line in plan.splitlines():
+        text = line.strip()
+        if connection.vendor == 'sqlite':
+            if (text.startswith('SCAN ') or ' SCAN ' in text) and 'USING' not in text:
+                warnings.append(text)
+            elif 'TEMP B-TREE' in text:
+                warnings.append(text)
+        elif 'Seq Scan' in text or text.lstrip('-> ').startswith('Sort '):
+            warnings.append(text)
+    return warnings
+
+
+def seed_rows(count):
+    """Insert `count` rows per audited table and ANALYZE, so the planner sees realistic tables."""
+    rng = random.Random(0)
+    today = timezone.now().date()
+    now = timezone.now()
+    user = get_user_model().objects.create_user(f'explain-{rng.random()}', password=None)
+
+    def day(i):
+        return today - datetime.timedelta(days=i % 3650)
+
+    Solution.objects.bulk_create(
+        Solution(
+            title=f'Solution {i}', slug=f'solution-{i}', description='-', icon='bi-cpu',
+            category=rng.choice(Solution.CATEGORY_CHOICES)[0], is_active=rng.random() < 0.9, order=i % 50,
+        )
+        for i in range(count)
+    )
+    Article.objects.bulk_create(
+        Article(
+            title=f'Article {i}', slug=f'article-{i}', content='-',
+            status='published' if rng.random() < 0.8 else 'draft', published_at=now - datetime.timedelta(hours=i),
+        )
+        for i in range(count)
+    )
+    Project.objects.bulk_create(
+        Project(title=f'Project {i}', slug=f'project-{i}', summary='-', description='-', completed_on=day(i))
+        for i in range(count)
+    )
+    Event.objects.bulk_create(
+        Event(
+            title=f'Event {i}', slug=f'explain-event-{i}', description='-', location='-', capacity=100,
+            event_type=rng.choice(Event.TYPE_CHOICES)[0], status=rng.choice(Event.STATUS_CHOICES)[0],
+            date=day(i), time=datetime.time(9 + i % 8),
+        )
+        for i in range(count)
+    )
+    GalleryItem.objects.bulk_create(
+        GalleryItem(
+            title=f'Photo {i}', description='-', location='-', event_name='-',
+            category=rng.choice(GalleryItem.CATEGORY_CHOICES)[0], event_date=day(i), order=i % 20,
+        )
+        for i in range(count)
+    )
+    Feedback.objects.bulk_create(
+        Feedback(user=user, rating=5, comment='-', is_approved=rng.random() < 0.95) for _ in range(count)
+    )
+    ContactInquiry.objects.bulk_create(
+        ContactInquiry(name='-', email='explain@example.com', message='-', is_read=rng.random() < 0.95)
+        for _ in range(count)
+    )
+    ActivityLog.objects.bulk_create(
+        ActivityLog(user=user, action='view', content_type='event', object_id=i, object_repr='-')
+        for i in range(count)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+class Command(BaseCommand):
+    help = 'Print the EXPLAIN plans of the main site and dashboard queries and flag full scans and sorts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Insert this many rows per table first (rolled back afterwards), so the planner sees a large table.',
+        )
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Exit with an error if any plan scans or sorts a whole table.',
+        )
+
+    def handle(self, *args, **options):
+        flagged = []
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.stdout.write(f"Seeding {options['seed']} rows per table (rolled back afterwards)...")
+                    seed_rows(options['seed'])
+                flagged = self.audit()
+                raise Rollback
+        except Rollback:
+            pass
+
+        if flagged:
+            message = f"{len(flagged)} queries scan or sort a whole table: {', '.join(flagged)}"
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('Every audited query uses an index.'))
+
+    def audit(self):
+        flagged = []
+        for name, queryset in audited_queries():
+            plan = queryset.explain()
+            warnings = plan_warnings(plan)
+            style = self.style.WARNING if warnings else self.style.SUCCESS
+            self.stdout.write(style(f"{name}{'  <-- full scan/sort' if warnings else ''}"))
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
+            if warnings:
+                flagged.append(name)
+        return flagged
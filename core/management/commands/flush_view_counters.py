@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.view_counters import COUNTED_MODELS, flush_view_counters
+
+
+class Command(BaseCommand):
+    help = 'Write buffered page views to Event, Project and BlogPost views_count'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', dest='models', default=[],
+            help='Only flush this model (e.g. event). Can be given more than once.',
+        )
+        parser.add_argument(
+            '--lock-timeout', type=int, default=300,
+            help='Seconds before a crashed flush stops blocking other flushers.',
+        )
+
+    def handle(self, *args, **options):
+        models = None
+        if options['models']:
+            wanted = {name.lower() for name in options['models']}
+            models = [m for m in COUNTED_MODELS.values() if m._meta.model_name in wanted]
+            if not models:
+                raise CommandError(f"No counted model matches {', '.join(sorted(wanted))}")
+
+        written = flush_view_counters(models=models, lock_timeout=options['lock_timeout'])
+        if not written:
+            self.stdout.write(self.style.WARNING('Another flush is running; nothing written.'))
+            return
+        for label, views in written.items():
+            self.stdout.write(f"{COUNTED_MODELS[label]._meta.verbose_name_plural}: {views} views written")
+        self.stdout.write(self.style.SUCCESS('View counters flushed.'))
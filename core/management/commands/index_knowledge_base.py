@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.knowledge_base import KB_SOURCES, get_retriever, index_model, publish_kb_version
+
+
+class Command(BaseCommand):
+    help = 'Index site content (solutions, events, articles, projects, about us) into the chatbot vector store'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', dest='models', default=[],
+            help='Only index this model (e.g. solution). Can be given more than once.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=200,
+            help='Rows fetched per database round-trip.',
+        )
+
+    def handle(self, *args, **options):
+        models = list(KB_SOURCES)
+        if options['models']:
+            wanted = {name.lower() for name in options['models']}
+            models = [m for m in models if m._meta.model_name in wanted]
+            if not models:
+                raise CommandError(f"No indexable model matches {', '.join(sorted(wanted))}")
+
+        vector_store = get_retriever().open_vector_store()
+        changed = False
+        for model in models:
+            result = index_model(model, vector_store=vector_store, chunk_size=options['chunk_size'])
+            changed = changed or bool(result['added'] or result['deleted'])
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {result['added']} added, "
+                f"{result['deleted']} deleted, {result['unchanged']} unchanged"
+            )
+        if changed:
+            # One snapshot export and kb_version bump for the whole run
+            publish_kb_version(vector_store)
+
+        self.stdout.write(self.style.SUCCESS('Knowledge base indexing complete.'))
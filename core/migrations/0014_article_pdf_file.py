@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_remove_feedback_approved_by_remove_feedback_avatar_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='pdf_file',
+            field=models.FileField(blank=True, null=True, upload_to='articles/pdfs/'),
+        ),
+    ]
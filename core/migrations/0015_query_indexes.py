@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_article_pdf_file'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['-timestamp'], name='activitylog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['status', '-published_at'], name='article_status_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactinquiry',
+            index=models.Index(fields=['-created_at'], name='inquiry_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactinquiry',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['created_at'], name='inquiry_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'time'], name='event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'date', 'time'], name='event_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['event_type', 'date', 'time'], name='event_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['-created_at'], name='feedback_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('is_approved', False)), fields=['created_at'], name='feedback_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryitem',
+            index=models.Index(fields=['-event_date', 'order'], name='gallery_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryitem',
+            index=models.Index(fields=['category', '-event_date', 'order'], name='gallery_cat_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-completed_on'], name='project_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solution',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order', 'title'], name='solution_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solution',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'order', 'title'], name='solution_active_cat_idx'),
+        ),
+    ]
@@ -17,6 +17,11 @@ from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 from django.urls import reverse
+from django.core.cache import cache
+from django.db.models import F
+import time
+
+_MISSING = object()
 
 # ----------------------------
 # Custom Admin User
@@ -64,14 +69,37 @@ class SiteSettings(models.Model):
     def __str__(self):
         return self.site_name
 
+    # Shared-cache key, plus a per-process copy so most renders skip the cache round trip too.
+    # Other processes pick up a change within SITE_SETTINGS_LOCAL_TTL seconds.
+    CACHE_KEY = 'core:site_settings:v1'
+    _local = None  # (expires_at, instance or None)
+
     def save(self, *args, **kwargs):
         if not self.pk and SiteSettings.objects.exists():
             raise ValueError('There can be only one SiteSettings instance')
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        SiteSettings.clear_cache()
+        return result
 
     @classmethod
     def load(cls):
-        return cls.objects.first()
+        """The singleton row (or None), from the process copy, then the cache, then the database."""
+        local = cls._local
+        now = time.monotonic()
+        if local is not None and local[0] > now:
+            return local[1]
+
+        instance = cache.get(cls.CACHE_KEY, _MISSING)
+        if instance is _MISSING:
+            instance = cls.objects.first()
+            cache.set(cls.CACHE_KEY, instance, timeout=settings.SITE_SETTINGS_CACHE_TIMEOUT)
+        cls._local = (now + settings.SITE_SETTINGS_LOCAL_TTL, instance)
+        return instance
+
+    @classmethod
+    def clear_cache(cls):
+        cls._local = None
+        cache.delete(cls.CACHE_KEY)
 
 # ----------------------------
 # Feedback Model
@@ -97,6 +125,11 @@ class Feedback(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='feedback_created_idx'),
+            # Moderation queue: only the (few) unapproved rows are indexed
+            models.Index(fields=['created_at'], condition=models.Q(is_approved=False), name='feedback_pending_idx'),
+        ]
 
     def __str__(self):
         return f"Feedback from {self.user.get_full_name() or self.user.username} - {self.rating}★"
@@ -130,6 +163,13 @@ class Solution(models.Model):
 
     class Meta:
         ordering = ['order', 'title']
+        indexes = [
+            # Solutions page, with and without the category filter; inactive rows are never listed
+            models.Index(fields=['order', 'title'], condition=models.Q(is_active=True), name='solution_active_order_idx'),
+            models.Index(
+                fields=['category', 'order', 'title'], condition=models.Q(is_active=True), name='solution_active_cat_idx',
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -162,6 +202,11 @@ class Project(models.Model):
     slug = models.SlugField(max_length=200, blank=True)
     views_count = models.PositiveIntegerField(default=0) 
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-completed_on'], name='project_completed_idx'),  # Home page latest projects
+        ]
+
     def __str__(self):
         return self.title
 
@@ -227,6 +272,7 @@ class Article(models.Model):
     article_type = models.CharField(max_length=50, choices=ARTICLE_TYPE_CHOICES, default='industry_report')
     author = models.CharField(max_length=100, blank=True)  # Can be changed to ForeignKey if needed
     featured_image = models.ImageField(upload_to='articles/', blank=True, null=True)
+    pdf_file = models.FileField(upload_to='articles/pdfs/', blank=True, null=True)  # Downloadable report
     published_at = models.DateTimeField(default=timezone.now, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -236,6 +282,9 @@ class Article(models.Model):
 
     class Meta:
         ordering = ['-published_at']
+        indexes = [
+            models.Index(fields=['status', '-published_at'], name='article_status_pub_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -244,8 +293,8 @@ class Article(models.Model):
         return reverse('core:article_detail', kwargs={'slug': self.slug})
 
     def increment_download_count(self):
-        self.download_count += 1
-        self.save(update_fields=['download_count'])
+        # Atomic UPDATE ... SET download_count = download_count + 1; no read-modify-write race
+        Article.objects.filter(pk=self.pk).update(download_count=F('download_count') + 1)
 
     def save(self, *args, **kwargs):
         # Generate slug if not set
@@ -296,6 +345,11 @@ class Event(models.Model):
     
     class Meta:
         ordering = ['date', 'time']
+        indexes = [
+            models.Index(fields=['date', 'time'], name='event_date_idx'),
+            models.Index(fields=['status', 'date', 'time'], name='event_status_date_idx'),
+            models.Index(fields=['event_type', 'date', 'time'], name='event_type_date_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         # Auto-generate slug if it's empty
@@ -361,6 +415,10 @@ class GalleryItem(models.Model):
     
     class Meta:
         ordering = ['-event_date', 'order']
+        indexes = [
+            models.Index(fields=['-event_date', 'order'], name='gallery_date_idx'),
+            models.Index(fields=['category', '-event_date', 'order'], name='gallery_cat_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.event_date}"
@@ -426,6 +484,10 @@ class ContactInquiry(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='inquiry_created_idx'),
+            models.Index(fields=['created_at'], condition=models.Q(is_read=False), name='inquiry_unread_idx'),
+        ]
     
     def __str__(self):
         return f"Inquiry from {self.name} - {self.company}"
@@ -503,6 +565,9 @@ class ActivityLog(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp'], name='activitylog_timestamp_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} {self.action} {self.content_type} at {self.timestamp}"
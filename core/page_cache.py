@@ -0,0 +1,131 @@
+"""
+Versioned page and fragment caching for the public site.
+
+Every cached page or fragment names the content sections it shows
+('solutions', 'projects', ...). Each section has a version number in the
+cache, and keys embed the current versions, so saving or deleting a model
+(see signals.py) bumps its sections and every dependent entry simply stops
+being looked up. Stale entries age out after PAGE_CACHE_TIMEOUT.
+"""
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .models import (
+    AboutUs, Article, Event, GalleryItem, Project, Project_tags, SiteSettings, Solution, Tag, TeamMember,
+)
+
+# model -> sections whose pages/fragments show it
+SECTION_MODELS = {
+    SiteSettings: ('site',),
+    AboutUs: ('about',),
+    TeamMember: ('about',),
+    Solution: ('solutions',),
+    Event: ('events',),
+    GalleryItem: ('gallery',),
+    Project: ('projects',),
+    Project_tags: ('projects',),
+    Tag: ('projects',),
+    Article: ('articles',),
+}
+SECTIONS = sorted({section for sections in SECTION_MODELS.values() for section in sections})
+
+# Saves that only touch these fields (view/download counters) don't invalidate anything
+COUNTER_FIELDS = frozenset({'views_count', 'download_count'})
+
+
+def _version_key(section):
+    return f'core:content_version:{section}'
+
+
+def section_versions(sections):
+    """{section: version}; a missing version starts at the current time so restarts never reuse old keys."""
+    keys = {_version_key(section): section for section in sections}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, section in keys.items():
+        if key not in found:
+            cache.add(key, int(time.time()), timeout=None)
+            found[key] = cache.get(key, 0)
+        versions[section] = found[key]
+    return versions
+
+
+def bump_sections(sections):
+    for section in sections:
+        try:
+            cache.incr(_version_key(section))
+        except ValueError:
+            cache.set(_version_key(section), int(time.time()), timeout=None)
+
+
+def _cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Pending flash messages must be shown (and consumed) by a real render
+    return not len(get_messages(request))
+
+
+def cache_anonymous_page(*sections, query_params=(), timeout=None):
+    """
+    Serve anonymous GET requests from the cache.
+
+    The key covers the host, path and the `query_params` the view reads,
+    plus the versions of `sections` and the site settings. A request with
+    any other query parameter (tracking tags, cache busters) is rendered
+    without the cache, so junk query strings can't fill it. Responses that
+    used a CSRF token or set cookies are never stored, since they are
+    specific to one visitor.
+    """
+    sections = tuple(sorted(set(sections) | {'site'}))
+    query_params = frozenset(query_params)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                not settings.PAGE_CACHE_ENABLED
+                or not _cacheable_request(request)
+                or not query_params.issuperset(request.GET)
+            ):
+                return view(request, *args, **kwargs)
+
+            versions = section_versions(sections)
+            query = urlencode(sorted((name, value) for name in request.GET for value in request.GET.getlist(name)))
+            url = f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+            digest = hashlib.md5(url.encode('utf-8')).hexdigest()
+            version_tag = '.'.join(str(versions[section]) for section in sections)
+            key = f'core:page:{view.__name__}:{version_tag}:{digest}'
+
+            cached = cache.get(key)
+            if cached is not None:
+                response = HttpResponse(cached['content'], content_type=cached['content_type'])
+                response['X-Page-Cache'] = 'hit'
+                return response
+
+            response = view(request, *args, **kwargs)
+            if (
+                response.status_code == 200
+                and not getattr(response, 'streaming', False)
+                and not response.cookies
+                and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            ):
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+                cache.set(
+                    key,
+                    {'content': response.content, 'content_type': response['Content-Type']},
+                    timeout=settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout,
+                )
+                response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,132 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .knowledge_base import KB_SOURCES, index_instance, publish_kb_version
+from .models import Project, SiteSettings
+from .page_cache import COUNTER_FIELDS, SECTION_MODELS, bump_sections
+
+logger = logging.getLogger(__name__)
+
+# One background worker keeps embedding calls out of the admin's request and
+# applies changes in the order they were saved.
+_kb_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kb-sync')
+# Queued syncs, and whether any of them changed the store since the last publish
+_kb_pending = 0
+_kb_changed = False
+_kb_lock = threading.Lock()
+
+
+def _sync_instance(model, pk):
+    # The worker thread keeps its own DB connection; drop it if stale or past CONN_MAX_AGE
+    close_old_connections()
+    changed = False
+    try:
+        result = index_instance(model, pk)
+        changed = bool(result['added'] or result['deleted'])
+        logger.info("Knowledge base sync for %s:%s: %s", model._meta.label_lower, pk, result)
+    except Exception:
+        logger.exception("Knowledge base sync failed for %s:%s", model._meta.label_lower, pk)
+    finally:
+        _finish_sync(changed)
+        close_old_connections()
+
+
+def _finish_sync(changed):
+    # Publish (snapshot export + kb_version bump) once the queue drains, not once per row,
+    # so a burst of admin saves empties the chat answer caches and rebuilds BM25 only once
+    global _kb_pending, _kb_changed
+    with _kb_lock:
+        _kb_pending -= 1
+        _kb_changed = _kb_changed or changed
+        publish = _kb_pending == 0 and _kb_changed
+        if publish:
+            _kb_changed = False
+    if not publish:
+        return
+    try:
+        publish_kb_version()
+    except Exception:
+        logger.exception("Publishing the knowledge base version failed")
+
+
+def _submit_sync(model, pk):
+    global _kb_pending
+    with _kb_lock:
+        _kb_pending += 1
+    _kb_executor.submit(_sync_instance, model, pk)
+
+
+def _schedule_sync(sender, instance):
+    _schedule_sync_pk(sender, instance.pk)
+
+
+def _schedule_sync_pk(model, pk):
+    if not settings.CHATBOT_KB_SYNC:
+        return
+    transaction.on_commit(lambda: _submit_sync(model, pk))
+
+
+@receiver(post_save)
+def sync_saved_content(sender, instance, raw=False, **kwargs):
+    if sender in KB_SOURCES and not raw:
+        _schedule_sync(sender, instance)
+
+
+@receiver(post_delete)
+def sync_deleted_content(sender, instance, **kwargs):
+    if sender in KB_SOURCES:
+        _schedule_sync(sender, instance)
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+def sync_project_tags(sender, instance, action, reverse, model, pk_set, **kwargs):
+    # Project text lists its tags; re-index the affected projects (syncs run after commit)
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _schedule_sync_pk(Project, instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        for pk in pk_set:
+            _schedule_sync_pk(Project, pk)
+    elif action == 'pre_clear':
+        # post_clear has no pk_set, so collect the tag's projects before they are unlinked
+        for pk in Project.objects.filter(tags=instance).values_list('pk', flat=True):
+            _schedule_sync_pk(Project, pk)
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def clear_site_settings_cache(sender, **kwargs):
+    # Also covers fixtures (raw saves skip SiteSettings.save()); clearing again after
+    # commit stops a concurrent request from caching the pre-commit row.
+    SiteSettings.clear_cache()
+    transaction.on_commit(SiteSettings.clear_cache)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_pages(sender, update_fields=None, **kwargs):
+    sections = SECTION_MODELS.get(sender)
+    if not sections:
+        return
+    # View/download counters are bumped on every visit; don't throw the pages away for them
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    # Bump now and again after commit, so a page rendered from the old rows in between isn't kept
+    bump_sections(sections)
+    transaction.on_commit(lambda: bump_sections(sections))
+
+
+@receiver(m2m_changed)
+def invalidate_cached_pages_m2m(sender, action, **kwargs):
+    # add()/remove()/clear() write the through table without sending post_save
+    sections = SECTION_MODELS.get(sender)
+    if not sections or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    bump_sections(sections)
+    transaction.on_commit(lambda: bump_sections(sections))
@@ -0,0 +1,162 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .management.commands.explain_queries import audited_queries, plan_warnings, seed_rows
+from .models import Event, Project, SiteSettings, Tag
+from .view_counters import CACHE_ALIAS, FLUSH_LOCK_KEY, _counter_key, flush_view_counters, record_view
+
+
+def table_queries(queries, model):
+    table = model._meta.db_table
+    return [q['sql'] for q in queries if table in q['sql']]
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class SiteSettingsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        SiteSettings.clear_cache()
+        self.site = SiteSettings.objects.create(site_name='Cached Site')
+
+    def test_warm_page_render_skips_site_settings_query(self):
+        self.client.get(reverse('core:about'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('core:about'))
+        self.assertContains(response, 'Cached Site')
+        self.assertEqual(table_queries(queries, SiteSettings), [])
+
+    def test_load_is_served_from_memory_after_warm_up(self):
+        SiteSettings.load()
+        with self.assertNumQueries(0):
+            self.assertEqual(SiteSettings.load().site_name, 'Cached Site')
+
+    def test_save_invalidates_cached_row(self):
+        SiteSettings.load()
+        self.site.site_name = 'Renamed Site'
+        self.site.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(SiteSettings.load().site_name, 'Renamed Site')
+        with self.assertNumQueries(0):
+            SiteSettings.load()
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        SiteSettings.clear_cache()
+
+    def test_whitelisted_query_is_cached(self):
+        self.assertEqual(self.client.get('/projects/?page=1').get('X-Page-Cache'), 'miss')
+        self.assertEqual(self.client.get('/projects/?page=1').get('X-Page-Cache'), 'hit')
+
+    def test_other_query_params_bypass_the_cache(self):
+        for _ in range(2):
+            response = self.client.get('/projects/?utm_source=mail')
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.get('X-Page-Cache'))
+
+    def test_tag_changes_invalidate_projects(self):
+        project = Project.objects.create(
+            title='Tagged', slug='tagged', summary='-', description='-', completed_on=datetime.date(2024, 1, 1),
+        )
+        tag = Tag.objects.create(name='Vision', slug='vision')
+        self.client.get('/projects/')
+        self.assertEqual(self.client.get('/projects/').get('X-Page-Cache'), 'hit')
+
+        project.tags.add(tag)
+        self.assertEqual(self.client.get('/projects/').get('X-Page-Cache'), 'miss')
+
+
+@override_settings(VIEW_COUNTER_BUFFERED=True, VIEW_COUNTER_FLUSH_INTERVAL=3600)
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        flush_view_counters()  # drain rows left dirty by other tests
+        self.events = [
+            Event.objects.create(
+                title=f'Expo {i}', slug=f'expo-{i}', description='-', date=datetime.date(2030, 1, 1),
+                time=datetime.time(10), location='-', capacity=10,
+            )
+            for i in range(3)
+        ]
+
+    def test_flush_writes_only_viewed_rows(self):
+        for _ in range(3):
+            record_view(self.events[0])
+        record_view(self.events[1])
+
+        # Savepoint, one UPDATE per distinct count, release: no scan of the table's pks
+        with self.assertNumQueries(4):
+            self.assertEqual(flush_view_counters(models=[Event]), {'core.event': 4})
+        self.assertEqual(
+            [e.views_count for e in Event.objects.filter(pk__in=[e.pk for e in self.events]).order_by('pk')],
+            [3, 1, 0],
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(flush_view_counters(models=[Event]), {'core.event': 0})
+
+    def test_missing_counter_is_skipped(self):
+        record_view(self.events[0])
+        record_view(self.events[1])
+        caches[CACHE_ALIAS].delete(_counter_key('core.event', self.events[0].pk))
+
+        self.assertEqual(flush_view_counters(models=[Event]), {'core.event': 1})
+        self.events[1].refresh_from_db()
+        self.assertEqual(self.events[1].views_count, 1)
+
+    def test_flush_releases_only_its_own_lock(self):
+        store = caches[CACHE_ALIAS]
+        self.assertEqual(flush_view_counters(models=[Event]), {'core.event': 0})
+        self.assertIsNone(store.get(FLUSH_LOCK_KEY))
+
+        def lock_expires_and_is_taken(*args):
+            store.set(FLUSH_LOCK_KEY, 42)
+            return 0
+
+        with mock.patch('core.view_counters._flush_model', side_effect=lock_expires_and_is_taken):
+            flush_view_counters(models=[Event])
+        self.assertEqual(store.get(FLUSH_LOCK_KEY), 42)
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_rows(2000)
+
+    def test_audited_queries_use_indexes(self):
+        for name, queryset in audited_queries():
+            with self.subTest(name):
+                self.assertEqual(plan_warnings(queryset.explain()), [])
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ListViewQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_rows(30)
+        SiteSettings.objects.create(site_name='Counted Site')
+
+    def setUp(self):
+        cache.clear()
+        SiteSettings.clear_cache()
+
+    def assertQueryCount(self, url, count):
+        self.assertEqual(self.client.get(url).status_code, 200)  # warm SiteSettings and the fragment cache
+        with self.assertNumQueries(count):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_list_views(self):
+        # Fixed per page whatever the row count: paginated lists are a COUNT plus one page
+        for url, count in [
+            ('/', 3), ('/solutions/', 1), ('/events/', 2), ('/gallery/', 2), ('/projects/', 2), ('/articles/', 2),
+        ]:
+            with self.subTest(url):
+                self.assertQueryCount(url, count)
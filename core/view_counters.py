@@ -0,0 +1,213 @@
+"""
+Buffered page-view counters.
+
+record_view() only increments a counter in the 'view_counters' cache, so
+viewing a detail page writes nothing to the database. Counters live in
+their own cache alias, never culled alongside page entries. The first
+view since the last flush adds the row to a per-model dirty set, so a
+flush only looks at rows that were viewed. flush_view_counters() moves the
+buffered counts into the models' views_count columns with one
+`UPDATE ... SET views_count = views_count + n` per model and distinct n.
+It runs from the request path at most every VIEW_COUNTER_FLUSH_INTERVAL
+seconds per process, at process exit, and from
+`manage.py flush_view_counters`.
+
+Counts are taken out of the cache with atomic incr/decr and written with
+F() expressions, so concurrent viewers and concurrent flushers (other
+workers, the command) never lose or double-count a view. On Redis the
+dirty sets are Redis sets shared by every worker. With the in-memory cache
+every process buffers on its own and the command only sees its own
+process; set CACHE_URL (or VIEW_COUNTER_CACHE_URL) to share one buffer.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import transaction
+from django.db.models import F
+
+from .models import BlogPost, Event, Project
+
+logger = logging.getLogger(__name__)
+
+COUNTED_MODELS = {model._meta.label_lower: model for model in (Event, Project, BlogPost)}
+FLUSH_LOCK_KEY = 'core:view_counts:flush_lock'
+CACHE_ALIAS = 'view_counters'
+# Compare-and-delete, so a flusher whose lock expired can't release the next flusher's
+_RELEASE_LOCK = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+_next_flush = 0.0
+_recorded = False  # whether this process buffered anything, for the exit flush
+# Dirty sets for an in-process cache, which only this process can see anyway
+_local_dirty = defaultdict(set)
+_local_dirty_lock = threading.Lock()
+
+
+def counters():
+    return caches[CACHE_ALIAS]
+
+
+def _counter_key(label, pk):
+    return f'core:view_counts:{label}:{pk}'
+
+
+def _dirty_key(label):
+    return f'core:view_counts:dirty:{label}'
+
+
+def _redis(store):
+    # The raw client behind a Redis cache alias, for the set commands Django's cache API lacks
+    return store._cache.get_client(write=True) if isinstance(store, RedisCache) else None
+
+
+def _mark_dirty(label, pks):
+    store = counters()
+    client = _redis(store)
+    if client is not None:
+        client.sadd(store.make_and_validate_key(_dirty_key(label)), *pks)
+        return
+    with _local_dirty_lock:
+        _local_dirty[label].update(pks)
+
+
+def _pop_dirty(label, count):
+    store = counters()
+    client = _redis(store)
+    if client is not None:
+        return [int(pk) for pk in client.spop(store.make_and_validate_key(_dirty_key(label)), count) or ()]
+    with _local_dirty_lock:
+        dirty = _local_dirty[label]
+        return [dirty.pop() for _ in range(min(count, len(dirty)))]
+
+
+def _add(key, delta):
+    """Atomically add `delta` to a counter that may be missing; returns the new value."""
+    store = counters()
+    try:
+        return store.incr(key, delta)
+    except ValueError:
+        # add() loses to a concurrent first view, whose key incr() then finds
+        if store.add(key, delta, timeout=None):
+            return delta
+        return store.incr(key, delta)
+
+
+def record_view(instance):
+    """Count one view of `instance` (an Event, Project or BlogPost)."""
+    label = instance._meta.label_lower
+    if not settings.VIEW_COUNTER_BUFFERED:
+        COUNTED_MODELS[label].objects.filter(pk=instance.pk).update(views_count=F('views_count') + 1)
+        return
+
+    global _recorded
+    _recorded = True
+    if _add(_counter_key(label, instance.pk), 1) == 1:
+        # First view since the last flush (which leaves the key at 0)
+        _mark_dirty(label, [instance.pk])
+    maybe_flush()
+
+
+def maybe_flush():
+    global _next_flush
+    now = time.monotonic()
+    if not _next_flush:
+        # A fresh process waits a full interval, so restarts don't all flush at once
+        _next_flush = now + settings.VIEW_COUNTER_FLUSH_INTERVAL
+    if now < _next_flush:
+        return
+    _next_flush = now + settings.VIEW_COUNTER_FLUSH_INTERVAL
+    try:
+        flush_view_counters(lock_timeout=settings.VIEW_COUNTER_FLUSH_INTERVAL)
+    except Exception:
+        logger.exception("Flushing view counters failed")
+
+
+def flush_view_counters(models=None, lock_timeout=60, chunk_size=500):
+    """
+    Write buffered views to the database; returns {model label: views written}.
+
+    Only one flusher runs at a time (a cache lock); others return {} at once.
+    The lock holds a per-flush token and is only released by its owner, so a
+    flush that outlives lock_timeout leaves a later flusher's lock alone.
+    """
+    store = counters()
+    # An int, which RedisCache stores as-is rather than pickled, so the release script can compare it
+    token = uuid.uuid4().int >> 66
+    if not store.add(FLUSH_LOCK_KEY, token, timeout=lock_timeout):
+        return {}
+    try:
+        return {
+            label: _flush_model(label, model, chunk_size)
+            for label, model in COUNTED_MODELS.items()
+            if models is None or model in models
+        }
+    finally:
+        _release_lock(store, token)
+
+
+def _release_lock(store, token):
+    client = _redis(store)
+    if client is not None:
+        client.eval(_RELEASE_LOCK, 1, store.make_and_validate_key(FLUSH_LOCK_KEY), token)
+    elif store.get(FLUSH_LOCK_KEY) == token:
+        store.delete(FLUSH_LOCK_KEY)
+
+
+def _flush_model(label, model, chunk_size):
+    store = counters()
+    written = 0
+    # Rows viewed again while this flush runs go back in the dirty set at the end, so the loop ends
+    still_dirty = []
+    try:
+        while True:
+            pks = _pop_dirty(label, chunk_size)
+            if not pks:
+                break
+            keys = {_counter_key(label, pk): pk for pk in pks}
+            taken = {}  # pk -> views taken out of the cache
+            try:
+                for key, count in store.get_many(list(keys)).items():
+                    if count <= 0:
+                        continue
+                    # decr, not delete: views recorded since get_many() stay for the next flush
+                    try:
+                        remaining = store.decr(key, count)
+                    except ValueError:
+                        continue  # evicted or deleted since get_many()
+                    taken[keys[key]] = count
+                    if remaining > 0:
+                        still_dirty.append(keys[key])
+                by_delta = defaultdict(list)
+                for pk, count in taken.items():
+                    by_delta[count].append(pk)
+                with transaction.atomic():
+                    for delta, ids in by_delta.items():
+                        model.objects.filter(pk__in=ids).update(views_count=F('views_count') + delta)
+            except Exception:
+                # Put the counts back so the next flush retries them
+                for pk, count in taken.items():
+                    _add(_counter_key(label, pk), count)
+                still_dirty.extend(pks)
+                raise
+            written += sum(taken.values())
+    finally:
+        if still_dirty:
+            _mark_dirty(label, still_dirty)
+    return written
+
+
+def _flush_at_exit():
+    if _recorded and settings.VIEW_COUNTER_BUFFERED:
+        try:
+            flush_view_counters()
+        except Exception:
+            logger.exception("Flushing view counters at exit failed")
+
+
+atexit.register(_flush_at_exit)
@@ -1,18 +1,20 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponse, Http404
+from django.http import JsonResponse, Http404
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.views.decorators.http import require_http_methods
-from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
-from django.utils import timezone
 import json
-import random
-from django.urls import reverse
 from django.core.paginator import Paginator
 from .forms import ClientLoginForm, ContactForm, FeedbackForm, NewsletterForm, ArticleForm ,EventForm, GalleryItemForm, ClientSignupForm
 from .models import *
+from .page_cache import cache_anonymous_page
+from .view_counters import record_view
+from .downloads import serve_file
+from .chatbot import (
+    FALLBACK_RESPONSE, RATE_LIMIT_RESPONSE, ask_rag_service, check_rate_limit, client_ip, get_intent_index,
+)
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 
@@ -48,6 +50,7 @@ def client_logout(request):
     logout(request)
     return redirect('core:client_login')
 
+@cache_anonymous_page('about', 'projects', 'articles', 'solutions')
 def home(request):
     """Homepage view"""
     site_settings = SiteSettings.load() or {
@@ -83,6 +86,7 @@ def home(request):
     
     return render(request, 'frontend/index.html', context)
 
+@cache_anonymous_page('about')
 def about(request):
     """About us page"""
     about_us = AboutUs.objects.first()
@@ -91,11 +95,11 @@ def about(request):
     context = {
         'about_us': about_us,
         'team_members': team_members,
-        'settings': SiteSettings.load(),
     }
     
     return render(request, 'frontend/about.html', context)
 
+@cache_anonymous_page('solutions', query_params=('category',))
 def solutions(request):
     """Solutions page with filtering by category and complexity"""
     
@@ -127,12 +131,12 @@ def solutions(request):
         # 'complexities': complexities,  # Pass complexities to template
         'selected_category': category,
         # 'selected_complexity': complexity,  # Pass selected complexity to template
-        'settings': SiteSettings.load(),
     }
     
     return render(request, 'frontend/solutions.html', context)
 
 
+@cache_anonymous_page('solutions')
 def solution_detail(request, solution_slug):
     """Solution detail page"""
     # Fetch the solution using its slug
@@ -144,7 +148,6 @@ def solution_detail(request, solution_slug):
     context = {
         'solution': solution,
         'related_solutions': related_solutions,
-        'settings': SiteSettings.load(),
     }
     
     return render(request, 'frontend/solution_detail.html', context)
@@ -164,7 +167,6 @@ def contact(request):
     
     context = {
         'form': form,
-        'settings': SiteSettings.load(),
     }
     
     return render(request, 'frontend/contact.html', context)
@@ -206,8 +208,7 @@ def contact(request):
 #     """Blog post detail page"""
 #     post = get_object_or_404(BlogPost, slug=slug, status='published')
     
-#     post.views_count += 1
-#     post.save(update_fields=['views_count'])
+#     record_view(post)
     
 #     related_posts = BlogPost.objects.filter(category=post.category, status='published').exclude(id=post.id)[:3]
     
@@ -237,7 +238,6 @@ def articles(request):
         'page_obj': page_obj,
         'types': types,
         'selected_type': article_type,
-        'settings': SiteSettings.load(),
     }
     
     return render(request, 'frontend/articles.html', context)
@@ -264,6 +264,7 @@ def article_detail(request, slug):
     article = get_object_or_404(Article, slug=slug)
     return render(request, 'frontend/article_detail.html', {'article': article})
 
+@cache_anonymous_page('events', query_params=('type', 'status', 'page'))
 def events(request):
     """Events page with optional add-event form"""
     
@@ -290,7 +291,7 @@ def events(request):
     if event_type:
         queryset = queryset.filter(event_type=event_type)
     if status:
-        queryset = queryset.filter(status__iexact=status)
+        queryset = queryset.filter(status=status.lower())
 
     events_list = queryset.order_by('date', 'time')
 
@@ -309,13 +310,13 @@ def events(request):
         'statuses': statuses,
         'selected_type': event_type,
         'selected_status': status,
-        'settings': SiteSettings.load(),
         'form': form,                   # for frontend add-event form
     }
     
     return render(request, 'frontend/events.html', context)
 
 
+@cache_anonymous_page('gallery', query_params=('category', 'page'))
 def gallery(request):
     """Gallery page with optional filtering and add-gallery form"""
 
@@ -354,7 +355,6 @@ def gallery(request):
         'page_obj': page_obj,
         'categories': categories,
         'selected_category': category,
-        'settings': SiteSettings.load(),
         'form': form,  # for frontend add-gallery form
     }
 
@@ -362,16 +362,13 @@ def gallery(request):
 def event_detail(request, slug):
     """Event detail page"""
     event = get_object_or_404(Event, slug=slug)
-    
-    event.views_count += 1
-    event.save(update_fields=['views_count'])
+    record_view(event)
     
     related_events = Event.objects.filter(event_type=event.event_type).exclude(id=event.id)[:3]
     
     context = {
         'event': event,
         'related_events': related_events,
-        'settings': SiteSettings.load(),
     }
     
     return render(request, 'frontend/event_detail.html', context)
@@ -401,51 +398,56 @@ def newsletter_signup(request):
         return JsonResponse({'success': False, 'message': 'An error occurred. Please try again.'})
 
 @require_http_methods(["POST"])
-def chatbot_response(request):
-    """Simple chatbot responses"""
+async def chatbot_response(request):
+    """Canned answers from the intent index; other questions go to the chatbot service"""
     try:
         data = json.loads(request.body)
-        message = data.get('message', '').lower()
-        
-        responses = {
-            'hello': "Hello! How can I help you today?",
-            'hi': "Hi there! What would you like to know about AI-Solution?",
-            'services': "We offer AI solutions for Healthcare, Finance, and Education. Which area interests you?",
-            'healthcare': "Our healthcare AI solutions include diagnostic assistance, patient management, and predictive analytics.",
-            'finance': "Our finance AI solutions include fraud detection, risk assessment, and algorithmic trading.",
-            'education': "Our education AI solutions include personalized learning, student assessment, and administrative automation.",
-            'contact': "You can reach us through our contact form or email us at info@ai-solution.com",
-            'pricing': "Our pricing varies based on your specific needs. Please contact us for a customized quote.",
-            'demo': "We'd be happy to show you a demo! Please use our contact form to schedule one.",
-            'thanks': "You're welcome! Is there anything else I can help you with?",
-            'bye': "Thank you for visiting AI-Solution. Have a great day!",
-        }
-        
-        response = "I'm sorry, I didn't understand that. Could you please rephrase your question or contact our support team?"
-        
-        for keyword, reply in responses.items():
-            if keyword in message:
-                response = reply
-                break
-        
-        return JsonResponse({'success': True, 'response': response})
+        message = str(data.get('message', '')).strip()
     except Exception:
         return JsonResponse({'success': False, 'response': 'Sorry, I encountered an error. Please try again.'})
 
+    intent = get_intent_index().match(message)
+    if intent is not None:
+        return JsonResponse({'success': True, 'response': intent.response, 'source': 'intent'})
+
+    session_id = request.headers.get('X-Session-ID', '')
+    ip = client_ip(request)
+    retry_after = check_rate_limit(ip, session_id) if message else None
+    if retry_after is not None:
+        response = JsonResponse({'success': True, 'response': RATE_LIMIT_RESPONSE, 'source': 'rate_limited'},
+                                status=429)
+        response['Retry-After'] = str(max(1, round(retry_after)))
+        return response
+    reply = await ask_rag_service(message, session_id, ip) if message else None
+    session_id = reply.session_id if reply else session_id
+    if reply is None or reply.answer is None:
+        response = JsonResponse({'success': True, 'response': FALLBACK_RESPONSE, 'source': 'fallback'})
+    else:
+        # The service's 429/503 keep their status so clients and proxies back off
+        source = {429: 'rate_limited', 503: 'busy'}.get(reply.status, 'rag')
+        response = JsonResponse({'success': True, 'response': reply.answer, 'source': source}, status=reply.status)
+        if reply.retry_after:
+            response['Retry-After'] = reply.retry_after
+    if session_id:
+        response['X-Session-ID'] = session_id
+    return response
+
+@require_http_methods(["GET", "HEAD"])
 def download_article(request, article_id):
     """Download article PDF"""
     article = get_object_or_404(Article, id=article_id)
     
-    if article.pdf_file:
-        article.download_count += 1
-        article.save(update_fields=['download_count'])
-        
-        response = HttpResponse(article.pdf_file.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{article.title}.pdf"'
-        return response
-    else:
+    if not article.pdf_file or not article.pdf_file.storage.exists(article.pdf_file.name):
         raise Http404("PDF file not found")
 
+    return serve_file(
+        request,
+        article.pdf_file,
+        filename=f'{article.title}.pdf',
+        content_type='application/pdf',
+        on_download=article.increment_download_count,
+    )
+
 @require_http_methods(["POST"])
 def event_registration(request, event_id):
     """Event registration via AJAX"""
@@ -516,7 +518,6 @@ def user_feedback(request):
 
     context = {
         'page_obj': page_obj,
-        'settings': SiteSettings.load(),  # optional site settings
     }
 
     return render(request, 'frontend/user_feedback.html', context)
@@ -538,6 +539,7 @@ def feedback(request):
     
 
 
+@cache_anonymous_page('projects', query_params=('tag', 'page'))
 def projects(request):
     """Projects page"""
     tag = request.GET.get('tag', '')
@@ -556,23 +558,19 @@ def projects(request):
         'page_obj': page_obj,
         'all_tags': all_tags,
         'selected_tag': tag,
-        'settings': SiteSettings.load(),
     }
     
     return render(request, 'frontend/projects.html', context)
 def project_detail(request, slug):
     """Project detail page"""
     project = get_object_or_404(Project, slug=slug)
-    
-    project.views_count += 1
-    project.save(update_fields=['views_count'])
+    record_view(project)
     
     related_projects = Project.objects.filter(tags__in=project.tags.all()).exclude(id=project.id).distinct()[:3]
     
     context = {
         'project': project,
         'related_projects': related_projects,
-        'settings': SiteSettings.load(),
     }
     
     return render(request, 'frontend/project_detail.html', context)
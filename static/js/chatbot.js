@@ -9,6 +9,10 @@ document.addEventListener('DOMContentLoaded', function() {
 
     if (!chatbotToggle) return; // Exit if chatbot elements don't exist
 
+    // FastAPI streaming endpoint; falls back to /api/chatbot/ when not configured
+    const streamUrl = chatbotWindow.dataset.streamUrl || '';
+    const SESSION_KEY = 'chatbotSessionId';
+
     // Toggle chatbot window
     chatbotToggle.addEventListener('click', function() {
         if (chatbotWindow.style.display === 'none' || !chatbotWindow.style.display) {
@@ -37,16 +41,35 @@ document.addEventListener('DOMContentLoaded', function() {
         // Show typing indicator
         addTypingIndicator();
 
-        // Send to backend
+        if (streamUrl) {
+            streamMessage(message).catch(function() {
+                // The stream service was unreachable and nothing rendered yet, so the plain endpoint can still answer
+                postMessage(message);
+            });
+        } else {
+            postMessage(message);
+        }
+    }
+
+    // Send to the Django chatbot endpoint and render the whole reply
+    function postMessage(message) {
+        const headers = {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken')
+        };
+        const sessionId = localStorage.getItem(SESSION_KEY);
+        if (sessionId) headers['X-Session-ID'] = sessionId;
+
         fetch('/api/chatbot/', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-CSRFToken': getCookie('csrftoken')
-            },
+            headers: headers,
             body: JSON.stringify({ message: message })
         })
-        .then(response => response.json())
+        .then(response => {
+            const newSessionId = response.headers.get('X-Session-ID');
+            if (newSessionId) localStorage.setItem(SESSION_KEY, newSessionId);
+            return response.json();
+        })
         .then(data => {
             removeTypingIndicator();
             if (data.success) {
@@ -61,6 +84,83 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // Stream tokens from the chatbot service (server-sent events) into one message
+    async function streamMessage(message) {
+        const headers = { 'Content-Type': 'application/json' };
+        const sessionId = localStorage.getItem(SESSION_KEY);
+        if (sessionId) headers['X-Session-ID'] = sessionId;
+
+        const response = await fetch(streamUrl, {
+            method: 'POST',
+            headers: headers,
+            body: JSON.stringify({ query: message })
+        });
+        const newSessionId = response.headers.get('X-Session-ID');
+        if (newSessionId) localStorage.setItem(SESSION_KEY, newSessionId);
+
+        if (!response.ok) {
+            // Rate limited (429) or busy (503): show the service's message rather than retrying
+            // on /api/chatbot/, which would only add load to what is already overloaded
+            const data = await response.json().catch(function() { return {}; });
+            removeTypingIndicator();
+            addMessage('bot', data.response || data.message ||
+                'Sorry, I encountered an error. Please try again or contact our support team.');
+            return;
+        }
+        if (!response.body) throw new Error('Stream unavailable');
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let messageContent = null;
+
+        const render = function(text, replace) {
+            if (!messageContent) {
+                removeTypingIndicator();
+                messageContent = addMessage('bot', '');
+            }
+            messageContent.textContent = replace ? text : messageContent.textContent + text;
+            chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
+        };
+
+        try {
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                // SSE frames are separated by a blank line
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+
+                    let event = 'message';
+                    let data = '';
+                    frame.split('\n').forEach(function(line) {
+                        if (line.startsWith('event:')) event = line.slice(6).trim();
+                        else if (line.startsWith('data:')) data += line.slice(5).trim();
+                    });
+                    if (!data) continue;
+
+                    const payload = JSON.parse(data);
+                    if (event === 'error') {
+                        render(payload.message, true);
+                    } else if (event === 'done') {
+                        render(payload.response, true);
+                    } else if (payload.token) {
+                        render(payload.token, false);
+                    }
+                }
+            }
+        } catch (error) {
+            // Keep a partially streamed answer rather than asking again
+            if (!messageContent) throw error;
+        }
+
+        if (!messageContent) throw new Error('Empty stream');
+    }
+
     // Send button click
     if (chatbotSend) {
         chatbotSend.addEventListener('click', sendMessage);
@@ -94,6 +194,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Scroll to bottom
         chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
+        return messageContent;
     }
 
     // Add typing indicator